@@ -1,8 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.routers import data, analysis
+from app.services.compute_pool import start_pool, shutdown_pool
+from app.services.io_service import BodySizeLimit
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one shared pool for CPU-bound work, sized to the machine
+    start_pool()
+    yield
+    shutdown_pool()
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
-app = FastAPI()
+# stop reading oversized uploads as they stream in, not after they are spooled
+app.add_middleware(BodySizeLimit)
 
 app.add_middleware(
     CORSMiddleware,
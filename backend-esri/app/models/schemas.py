@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class ColumnsResponse(BaseModel):
@@ -8,3 +8,23 @@ class ColumnsResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     detail: str
+
+class SelectedPlots(BaseModel):
+    """Which plots /export/plots should render (the UI's checkbox state; null is off)."""
+    originalHistogram: Optional[bool] = False
+    dlHistogram: Optional[bool] = False
+    qqPlot: Optional[bool] = False
+    originalHeatmap: Optional[bool] = False
+    dlHeatmap: Optional[bool] = False
+    comparisonHeatmap: Optional[bool] = False
+
+class LegendRange(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    auto: Optional[bool] = True  # null is falsy: use min/max if both are set
+
+class LegendConfig(BaseModel):
+    """Per-heatmap legend ranges; missing plots/fields fall back to auto."""
+    original: LegendRange = Field(default_factory=LegendRange)
+    dl: LegendRange = Field(default_factory=LegendRange)
+    comparison: LegendRange = Field(default_factory=LegendRange)
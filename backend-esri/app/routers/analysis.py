@@ -3,32 +3,68 @@ from typing import Dict, Literal, Tuple
 import base64
 import matplotlib
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from matplotlib.artist import setp
+from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
 import numpy as np
 import pandas as pd
-from app.services.io_service import dataframe_from_upload, dataframe_from_upload_cols  # NEW
+from app.services.io_service import dataframe_from_upload, dataframe_from_upload_cols, UploadTooLarge  # NEW
 from pydantic import BaseModel
+from app.models.schemas import LegendConfig, SelectedPlots
 from app.services.comparisons import COMPARISON_METHODS
+from app.services.cache_service import get_cached, put_cached, get_parsed, put_parsed, upload_digest
+from app.services.compute_pool import run_cpu
 from pyproj import Transformer 
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import asyncio
 import io
+import os
 
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 
+def _read_upload(upload: UploadFile, digest: str, cols: list[str] | None) -> pd.DataFrame:
+    """Parse one upload, or reuse the frame parsed earlier from identical bytes."""
+    key = (digest, os.path.splitext((upload.filename or "").lower())[1], tuple(cols) if cols else None)
+    df = get_parsed(key)
+    if df is None:
+        df = dataframe_from_upload(upload) if cols is None else dataframe_from_upload_cols(upload, cols)
+        put_parsed(key, df)
+    return df
+
+async def _read_both(original: UploadFile, dl: UploadFile,
+                     cols_o: list[str] | None = None, cols_d: list[str] | None = None,
+                     digests: tuple[str, str] | None = None):
+    """
+    Parse both uploads concurrently on the compute pool (the pyarrow reader
+    releases the GIL), keeping the event loop free while they load. Frames are
+    cached by content digest, so re-sent files are not parsed again; the
+    returned frames are shared and must not be modified.
+    """
+    if digests is None:
+        digests = await asyncio.gather(run_cpu(upload_digest, original), run_cpu(upload_digest, dl))
+    if cols_o is None or cols_d is None:
+        cols_o = cols_d = None
+    return await asyncio.gather(run_cpu(_read_upload, original, digests[0], cols_o),
+                                run_cpu(_read_upload, dl, digests[1], cols_d))
+
 def _clean_and_stats(df: pd.DataFrame, assay_col: str) -> Dict[str, float]:
     if assay_col not in df.columns:
         raise ValueError(f"Column '{assay_col}' not found")
-    # coerce to numeric, drop NaNs, drop <= 0
-    s = pd.to_numeric(df[assay_col], errors="coerce").dropna()
-    s = s[s > 0]
-    if s.empty:
+    # coerce to numeric, keep > 0 (NaN compares False, so one mask drops both)
+    v = pd.to_numeric(df[assay_col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    v = v[v > 0]
+    n = v.shape[0]
+    if n == 0:
         return {"count": 0, "mean": None, "median": None, "max": None, "std": None}
+    # reductions on the already-clean buffer: no per-call NaN skipping as in Series.mean/std
+    mean = v.mean()
     return {
-        "count": int(s.shape[0]),
-        "mean": float(s.mean()),
-        "median": float(s.median()),
-        "max": float(s.max()),
-        "std": float(s.std(ddof=1)),  # sample std
+        "count": int(n),
+        "mean": float(mean),
+        "median": float(np.median(v)),
+        "max": float(v.max()),
+        "std": float(np.sqrt(np.square(v - mean).sum() / (n - 1))) if n > 1 else float("nan"),  # sample std
     }
 
 @router.post("/summary")
@@ -39,11 +75,12 @@ async def summary(
     dl_assay: str        = Form(...),
 ):
     try:
-        df_o = dataframe_from_upload(original)
-        df_d = dataframe_from_upload(dl)
-        stats_o = _clean_and_stats(df_o, original_assay)
-        stats_d = _clean_and_stats(df_d, dl_assay)
+        df_o, df_d = await _read_both(original, dl)
+        stats_o, stats_d = await asyncio.gather(run_cpu(_clean_and_stats, df_o, original_assay),
+                                                run_cpu(_clean_and_stats, df_d, dl_assay))
         return {"original": stats_o, "dl": stats_d}
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -60,19 +97,69 @@ class PlotsDataResponse(BaseModel):
 def _clean_series(df: pd.DataFrame, assay_col: str) -> pd.Series:
     if assay_col not in df.columns:
         raise ValueError(f"Column '{assay_col}' not found")
-    s = pd.to_numeric(df[assay_col], errors="coerce").dropna()
-    s = s[s > 0]
-    return s
+    s = pd.to_numeric(df[assay_col], errors="coerce")
+    return s[s > 0]  # NaN > 0 is False, so no separate dropna pass
+
+def _qq_quantiles(s: pd.Series, q: np.ndarray) -> np.ndarray:
+    # For the QQ plot's many q, sorting once is faster than np.quantile's
+    # partition around two kth indices per q; the order statistics are the same.
+    return np.quantile(np.sort(s.to_numpy(dtype=float, copy=False)), q)
+
 
 def _fig_to_b64(fig) -> str:
-    import io
     buf = io.BytesIO()
     fig.tight_layout()
     fig.savefig(buf, format="png", dpi=120)
-    plt.close(fig)
     buf.seek(0)
     return base64.b64encode(buf.read()).decode("ascii")
 
+def _render_plots(df_o: pd.DataFrame, df_d: pd.DataFrame, original_assay: str, dl_assay: str) -> dict:
+    """
+    Render the /plots PNGs. Runs on the compute pool, so figures are built with
+    the object-oriented Figure API rather than pyplot's shared global state.
+    """
+    s_o = _clean_series(df_o, original_assay)
+    s_d = _clean_series(df_d, dl_assay)
+
+    # Histogram (Original) with log-spaced bins
+    fig1 = Figure(figsize=(7,4))
+    ax1 = fig1.add_subplot(111)
+    bins_o = np.logspace(np.log10(s_o.min()), np.log10(s_o.max()), 50)
+    ax1.hist(s_o, bins=bins_o, color="#7C3AED", edgecolor="black")
+    ax1.set_xscale("log")
+    ax1.set_title(f"Original {original_assay} Distribution")
+    ax1.set_xlabel(original_assay)
+    ax1.set_ylabel("Count")
+    original_png = _fig_to_b64(fig1)
+
+    # Histogram (DL) with log-spaced bins
+    fig2 = Figure(figsize=(7,4))
+    ax2 = fig2.add_subplot(111)
+    bins_d = np.logspace(np.log10(s_d.min()), np.log10(s_d.max()), 50)
+    ax2.hist(s_d, bins=bins_d, color="#7C3AED", edgecolor="black")
+    ax2.set_xscale("log")
+    ax2.set_title(f"DL {dl_assay} Distribution")
+    ax2.set_xlabel(dl_assay)
+    ax2.set_ylabel("Count")
+    dl_png = _fig_to_b64(fig2)
+
+    # QQ plot (log–log)
+    q = np.linspace(0.01, 0.99, 50)
+    qo = _qq_quantiles(s_o, q)
+    qd = _qq_quantiles(s_d, q)
+    fig3 = Figure(figsize=(6,6))
+    ax3 = fig3.add_subplot(111)
+    ax3.scatter(qo, qd, s=20, color="#7C3AED")
+    line = np.linspace(min(qo.min(), qd.min()), max(qo.max(), qd.max()), 100)
+    ax3.plot(line, line, "--", linewidth=1)
+    ax3.set_xscale("log"); ax3.set_yscale("log")
+    ax3.set_title("QQ Plot (log–log): Original vs DL")
+    ax3.set_xlabel(f"Original {original_assay} quantiles")
+    ax3.set_ylabel(f"DL {dl_assay} quantiles")
+    qq_png = _fig_to_b64(fig3)
+
+    return {"original_png": original_png, "dl_png": dl_png, "qq_png": qq_png}
+
 @router.post("/plots", response_model=PlotsResponse)
 async def plots(
     original: UploadFile = File(..., description="Original Data .csv, .dbf or .zip"),
@@ -82,50 +169,10 @@ async def plots(
 ):
     try:
         # read only the assay columns (fast)
-        df_o = dataframe_from_upload_cols(original, [original_assay])
-        df_d = dataframe_from_upload_cols(dl, [dl_assay])
-
-        s_o = _clean_series(df_o, original_assay)
-        s_d = _clean_series(df_d, dl_assay)
-
-        # Histogram (Original) with log-spaced bins
-        fig1 = plt.figure(figsize=(7,4))
-        ax1 = fig1.add_subplot(111)
-        bins_o = np.logspace(np.log10(s_o.min()), np.log10(s_o.max()), 50)
-        ax1.hist(s_o, bins=bins_o, color="#7C3AED", edgecolor="black")
-        ax1.set_xscale("log")
-        ax1.set_title(f"Original {original_assay} Distribution")
-        ax1.set_xlabel(original_assay)
-        ax1.set_ylabel("Count")
-        original_png = _fig_to_b64(fig1)
-
-        # Histogram (DL) with log-spaced bins
-        fig2 = plt.figure(figsize=(7,4))
-        ax2 = fig2.add_subplot(111)
-        bins_d = np.logspace(np.log10(s_d.min()), np.log10(s_d.max()), 50)
-        ax2.hist(s_d, bins=bins_d, color="#7C3AED", edgecolor="black")
-        ax2.set_xscale("log")
-        ax2.set_title(f"DL {dl_assay} Distribution")
-        ax2.set_xlabel(dl_assay)
-        ax2.set_ylabel("Count")
-        dl_png = _fig_to_b64(fig2)
-
-        # QQ plot (log–log)
-        q = np.linspace(0.01, 0.99, 50)
-        qo = np.quantile(s_o, q)
-        qd = np.quantile(s_d, q)
-        fig3 = plt.figure(figsize=(6,6))
-        ax3 = fig3.add_subplot(111)
-        ax3.scatter(qo, qd, s=20, color="#7C3AED")
-        line = np.linspace(min(qo.min(), qd.min()), max(qo.max(), qd.max()), 100)
-        ax3.plot(line, line, "--", linewidth=1)
-        ax3.set_xscale("log"); ax3.set_yscale("log")
-        ax3.set_title("QQ Plot (log–log): Original vs DL")
-        ax3.set_xlabel(f"Original {original_assay} quantiles")
-        ax3.set_ylabel(f"DL {dl_assay} quantiles")
-        qq_png = _fig_to_b64(fig3)
-
-        return {"original_png": original_png, "dl_png": dl_png, "qq_png": qq_png}
+        df_o, df_d = await _read_both(original, dl, [original_assay], [dl_assay])
+        return await run_cpu(_render_plots, df_o, df_d, original_assay, dl_assay)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -138,8 +185,7 @@ async def plots_data(
 ):
     try:
         # read only the assay columns (fast)
-        df_o = dataframe_from_upload_cols(original, [original_assay])
-        df_d = dataframe_from_upload_cols(dl, [dl_assay])
+        df_o, df_d = await _read_both(original, dl, [original_assay], [dl_assay])
 
         s_o = _clean_series(df_o, original_assay)
         s_d = _clean_series(df_d, dl_assay)
@@ -150,9 +196,9 @@ async def plots_data(
         bin_centers_o = (bin_edges_o[:-1] + bin_edges_o[1:]) / 2
         
         original_data = {
-            "x": bin_centers_o.tolist(),
-            "y": hist_o.tolist(),
-            "bin_edges": bin_edges_o.tolist(),
+            "x": bin_centers_o,
+            "y": hist_o,
+            "bin_edges": bin_edges_o,
             "title": f"Original {original_assay} Distribution",
             "xlabel": original_assay,
             "ylabel": "Count",
@@ -165,9 +211,9 @@ async def plots_data(
         bin_centers_d = (bin_edges_d[:-1] + bin_edges_d[1:]) / 2
         
         dl_data = {
-            "x": bin_centers_d.tolist(),
-            "y": hist_d.tolist(),
-            "bin_edges": bin_edges_d.tolist(),
+            "x": bin_centers_d,
+            "y": hist_d,
+            "bin_edges": bin_edges_d,
             "title": f"DL {dl_assay} Distribution",
             "xlabel": dl_assay,
             "ylabel": "Count",
@@ -176,8 +222,8 @@ async def plots_data(
 
         # QQ plot data
         q = np.linspace(0.01, 0.99, 50)
-        qo = np.quantile(s_o, q)
-        qd = np.quantile(s_d, q)
+        qo = _qq_quantiles(s_o, q)
+        qd = _qq_quantiles(s_d, q)
         
         # Create reference line data
         min_val = min(qo.min(), qd.min())
@@ -186,10 +232,10 @@ async def plots_data(
         line_y = line_x
         
         qq_data = {
-            "x": qo.tolist(),
-            "y": qd.tolist(),
-            "line_x": line_x.tolist(),
-            "line_y": line_y.tolist(),
+            "x": qo,
+            "y": qd,
+            "line_x": line_x,
+            "line_y": line_y,
             "title": "QQ Plot (log–log): Original vs DL",
             "xlabel": f"Original {original_assay} quantiles",
             "ylabel": f"DL {dl_assay} quantiles",
@@ -197,37 +243,162 @@ async def plots_data(
             "log_y": True
         }
 
-        return {
+        # numpy arrays go straight to orjson (no .tolist() boxing, no model re-validation)
+        return ORJSONResponse({
             "original_data": original_data,
             "dl_data": dl_data,
             "qq_data": qq_data
-        }
+        })
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # --- Helpers for grid comparison (replace old single-cell helpers) ---
-def _grid_meta_xy(east: pd.Series, north: pd.Series, cell_x: float, cell_y: float):
-    xmin = float(np.floor(east.min()  / cell_x) * cell_x)
-    ymin = float(np.floor(north.min() / cell_y) * cell_y)
-    nx   = int(((east.max()  - xmin) // cell_x) + 1)
-    ny   = int(((north.max() - ymin) // cell_y) + 1)
+# Coordinates and assays stay as plain float arrays until the one frame the
+# comparison registry needs is built, so no intermediate DataFrames are made.
+def _grid_meta_xy(east: list[np.ndarray], north: list[np.ndarray], cell_x: float, cell_y: float):
+    # bounds are reduced per array, so the inputs never need to be concatenated
+    e_min, e_max = min(a.min() for a in east),  max(a.max() for a in east)
+    n_min, n_max = min(a.min() for a in north), max(a.max() for a in north)
+    xmin = float(np.floor(e_min / cell_x) * cell_x)
+    ymin = float(np.floor(n_min / cell_y) * cell_y)
+    nx   = int(((e_max - xmin) // cell_x) + 1)
+    ny   = int(((n_max - ymin) // cell_y) + 1)
     return xmin, ymin, nx, ny
 
-def _index_cols_xy(df: pd.DataFrame, easting: str, northing: str,
-                   xmin: float, ymin: float, cell_x: float, cell_y: float) -> pd.DataFrame:
-    df = df.copy()
-    df["grid_ix"] = ((df[easting]  - xmin) // cell_x).astype(int)
-    df["grid_iy"] = ((df[northing] - ymin) // cell_y).astype(int)
-    return df
+def _index_xy(east: np.ndarray, north: np.ndarray, assay: np.ndarray,
+              xmin: float, ymin: float, cell_x: float, cell_y: float, nx: int) -> pd.DataFrame:
+    """Build the grid-indexed frame (grid_ix/grid_iy/grid_id/Te_ppm) in one go."""
+    ix = np.floor_divide(east  - xmin, cell_x).astype(np.int64)
+    iy = np.floor_divide(north - ymin, cell_y).astype(np.int64)
+    return pd.DataFrame({
+        "grid_ix": ix,
+        "grid_iy": iy,
+        # packed row-major cell id: one int64 key for the per-cell reduction
+        "grid_id": iy * nx + ix,
+        "Te_ppm": assay,
+    })
+
+def _looks_like_degrees(east: list[np.ndarray], north: list[np.ndarray]) -> bool:
+    # bounds only: per-array min/max, no concat and no boolean masks
+    return bool(all(-180 <= a.min() and a.max() <= 180 for a in east)
+                and all(-90 <= a.min() and a.max() <= 90 for a in north))
+
+def _to_float(df: pd.DataFrame, cols: list[str], positive: str | None = None) -> list[np.ndarray]:
+    """
+    Return `cols` as float arrays, dropping rows with NaNs (and rows where
+    `positive` <= 0). The upload frame itself is never copied.
+    """
+    vals = {c: pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float, na_value=np.nan) for c in cols}
+    # `positive` > 0 is already False for NaN, and NaN propagates through +, so
+    # one isnan over the sum of the other columns replaces a pass per column
+    keep = vals[positive] > 0 if positive is not None else np.ones(len(df), dtype=bool)
+    rest = [vals[c] for c in cols if c != positive]
+    if rest:
+        keep &= ~np.isnan(sum(rest[1:], rest[0]))
+    return [vals[c][keep] for c in cols]
+
+def _downsample_xy(east: np.ndarray, north: np.ndarray, n: int = 5000) -> np.ndarray:
+    # same rows DataFrame.sample(n, random_state=42) would pick
+    k = min(n, len(east))
+    idx = np.random.RandomState(42).choice(len(east), size=k, replace=False)
+    return np.column_stack((east[idx], north[idx]))
+
+GRID_WIRE_DTYPE = "float32"
+
+def _grid_b64(arr: np.ndarray) -> str:
+    """
+    Raw little-endian float32 bytes of a (ny, nx) grid, row-major, base64 encoded.
+    Cell stats are only coloured/labelled in the browser, so ~7 significant
+    digits is plenty and halves the payload; NaN gaps survive the downcast.
+    """
+    return base64.b64encode(np.ascontiguousarray(arr, dtype="<f4").tobytes()).decode("ascii")
 
-def _looks_like_degrees(east: pd.Series, north: pd.Series) -> bool:
-    return bool(east.between(-180, 180).all() and north.between(-90, 90).all())
+def _points_b64(pts: np.ndarray, x0: float, y0: float) -> str:
+    """
+    Pack [[e, n], ...] as little-endian float32 pairs offset from (x0, y0), base64
+    encoded. Offsets keep float32 at sub-metre precision for projected coordinates.
+    """
+    # subtract straight into the float32 buffer; no float64 offsets array in between
+    off = np.empty(np.shape(pts), dtype="<f4")
+    np.subtract(pts, (x0, y0), out=off, casting="same_kind")
+    return base64.b64encode(off.tobytes()).decode("ascii")
+
+def _grid_frames(df_o: pd.DataFrame, df_d: pd.DataFrame,
+                 cols_o: list[str], cols_d: list[str],
+                 method: str, grid_size: float, treat_as: str) -> dict:
+    """
+    CPU-bound half of _build_grid: clean, project and grid the two frames, then
+    run the comparison method. cols_* are [easting, northing, assay].
+    """
+    # 1) Clean
+    e_o, n_o, v_o = _to_float(df_o, cols_o, positive=cols_o[2])
+    e_d, n_d, v_d = _to_float(df_d, cols_d, positive=cols_d[2])
+    if len(v_o) == 0 or len(v_d) == 0:
+        raise ValueError("No valid rows after cleaning (assay <= 0 removed).")
+
+    # 2) Decide units, and project to meters if inputs are degrees
+    looks_deg = _looks_like_degrees([e_o, e_d], [n_o, n_d])
+    use_degrees = (treat_as == "degrees") or (treat_as == "auto" and looks_deg)
+
+    if use_degrees:
+        # Project lon/lat (EPSG:4326) → meters (EPSG:3577)
+        transformer = Transformer.from_crs("EPSG:4326", "EPSG:3577", always_xy=True)
+        e_o, n_o = transformer.transform(e_o, n_o)
+        e_d, n_d = transformer.transform(e_d, n_d)
+
+    # 3) Grid meta (meters)
+    cell_x = cell_y = float(grid_size)
+    xmin, ymin, nx, ny = _grid_meta_xy([e_o, e_d], [n_o, n_d], cell_x, cell_y)
+
+    # 4) Index into the grid (assay → Te_ppm)
+    o_idx = _index_xy(e_o, n_o, v_o, xmin, ymin, cell_x, cell_y, nx)
+    d_idx = _index_xy(e_d, n_d, v_d, xmin, ymin, cell_x, cell_y, nx)
+
+    # 5) Compute arrays via registry
+    fn = COMPARISON_METHODS[method]
+    arr_orig, arr_dl, arr_cmp = fn(d_idx, o_idx, nx, ny)
+
+    # 6) Downsample overlay points (in meters)
+    o_pts = _downsample_xy(e_o, n_o)
+    d_pts = _downsample_xy(e_d, n_d)
+
+    g = {
+        "nx": nx, "ny": ny,
+        "xmin": xmin, "ymin": ymin,
+        "cell": cell_x,
+        "arr_orig": arr_orig, "arr_dl": arr_dl, "arr_cmp": arr_cmp,
+        # all original points (drawn in full on the exported heatmap) + overlays
+        "orig_xy": np.column_stack((e_o, n_o)),
+        "o_pts": o_pts, "d_pts": d_pts,
+    }
+    return g
 
-def _to_float(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
-    df = df.copy()
-    for c in cols:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-    return df.dropna()
+async def _build_grid(original: UploadFile, dl: UploadFile,
+                      original_easting: str, original_northing: str, original_assay: str,
+                      dl_easting: str, dl_northing: str, dl_assay: str,
+                      method: str, grid_size: float, treat_as: str = "auto") -> dict:
+    """
+    Read, clean, project and grid both uploads, then run the comparison method.
+    The result is cached by upload content + parameters, so /export/plots reuses
+    the grid that /comparison just built. The returned arrays are shared and read-only.
+    """
+    digests = await asyncio.gather(run_cpu(upload_digest, original), run_cpu(upload_digest, dl))
+    key = (*digests,
+           original_easting, original_northing, original_assay,
+           dl_easting, dl_northing, dl_assay,
+           method, float(grid_size), treat_as)
+    hit = await run_cpu(get_cached, key)
+    if hit is not None:
+        return hit
+
+    cols_o = [original_easting, original_northing, original_assay]
+    cols_d = [dl_easting, dl_northing, dl_assay]
+    df_o, df_d = await _read_both(original, dl, cols_o, cols_d, digests)
+    g = await run_cpu(_grid_frames, df_o, df_d, cols_o, cols_d, method, grid_size, treat_as)
+    await run_cpu(put_cached, key, g)
+    return g
 
 @router.post("/comparison")
 async def comparison(
@@ -244,71 +415,25 @@ async def comparison(
     treat_as: Literal["auto","meters","degrees"] = Form("auto"),
 ):
     try:
-        # 1) Read & clean
-        df_o = dataframe_from_upload_cols(original, [original_easting, original_northing, original_assay])
-        df_d = dataframe_from_upload_cols(dl,       [dl_easting,       dl_northing,       dl_assay])
-
-        df_o = _to_float(df_o, [original_easting, original_northing, original_assay])
-        df_d = _to_float(df_d, [dl_easting, dl_northing, dl_assay])
-        df_o = df_o[df_o[original_assay] > 0]
-        df_d = df_d[df_d[dl_assay] > 0]
-        if df_o.empty or df_d.empty:
-            raise ValueError("No valid rows after cleaning (assay <= 0 removed).")
-
-        # 2) Decide units, and project to meters if inputs are degrees
-        looks_deg = _looks_like_degrees(
-            pd.concat([df_o[original_easting], df_d[dl_easting]], ignore_index=True),
-            pd.concat([df_o[original_northing], df_d[dl_northing]], ignore_index=True),
-        )
-        use_degrees = (treat_as == "degrees") or (treat_as == "auto" and looks_deg)
-
-        if use_degrees:
-            # Project lon/lat (EPSG:4326) → meters (EPSG:3577)
-            transformer = Transformer.from_crs("EPSG:4326", "EPSG:3577", always_xy=True)
-            ex_o, ny_o = transformer.transform(df_o[original_easting].values, df_o[original_northing].values)
-            ex_d, ny_d = transformer.transform(df_d[dl_easting].values,       df_d[dl_northing].values)
-            df_o["__E_m"], df_o["__N_m"] = ex_o, ny_o
-            df_d["__E_m"], df_d["__N_m"] = ex_d, ny_d
-            e_col_o, n_col_o = "__E_m", "__N_m"
-            e_col_d, n_col_d = "__E_m", "__N_m"
-            coord_units = "meters"
-        else:
-            # Already meters
-            e_col_o, n_col_o = original_easting, original_northing
-            e_col_d, n_col_d = dl_easting,       dl_northing
-            coord_units = "meters"
-
-        # 3) Grid meta (meters)
-        cell_x = cell_y = float(grid_size)
-        e_all = pd.concat([df_o[e_col_o], df_d[e_col_d]], ignore_index=True)
-        n_all = pd.concat([df_o[n_col_o], df_d[n_col_d]], ignore_index=True)
-        xmin, ymin, nx, ny = _grid_meta_xy(e_all, n_all, cell_x, cell_y)
-
-        # 4) Index + rename assay → Te_ppm
-        o_idx = _index_cols_xy(df_o, e_col_o, n_col_o, xmin, ymin, cell_x, cell_y)\
-                  .rename(columns={original_assay: "Te_ppm"})
-        d_idx = _index_cols_xy(df_d, e_col_d, n_col_d, xmin, ymin, cell_x, cell_y)\
-                  .rename(columns={dl_assay: "Te_ppm"})
-
-        # 5) Compute arrays via registry
-        fn = COMPARISON_METHODS[method]
-        arr_orig, arr_dl, arr_cmp = fn(d_idx, o_idx, nx, ny)
-
-        # 6) Downsample overlay points (in meters)
-        def _downsample(df, n=5000):
-            return df.sample(n=min(n, len(df)), random_state=42)
-        o_pts = _downsample(o_idx)[[e_col_o, n_col_o]].values.tolist()
-        d_pts = _downsample(d_idx)[[e_col_d, n_col_d]].values.tolist()
-
-        # 7) Grid centers (meters)
-        x = (xmin + (np.arange(nx) + 0.5) * cell_x).tolist()
-        y = (ymin + (np.arange(ny) + 0.5) * cell_y).tolist()
-
-        # 8) JSON-safe arrays
-        def _to_jsonable(a: np.ndarray):
-            return [[(float(v) if np.isfinite(v) else None) for v in row] for row in a]
-
-        return {
+        g = await _build_grid(original, dl,
+                              original_easting, original_northing, original_assay,
+                              dl_easting, dl_northing, dl_assay,
+                              method, grid_size, treat_as)
+        nx, ny = g["nx"], g["ny"]
+        xmin, ymin = g["xmin"], g["ymin"]
+        cell_x = cell_y = g["cell"]
+        arr_orig, arr_dl, arr_cmp = g["arr_orig"], g["arr_dl"], g["arr_cmp"]
+        o_pts, d_pts = g["o_pts"], g["d_pts"]
+        coord_units = "meters"
+
+        # Grid centers (meters)
+        x = xmin + (np.arange(nx) + 0.5) * cell_x
+        y = ymin + (np.arange(ny) + 0.5) * cell_y
+
+        # Grids and overlay points go out as base64 binary (float32 grids, float32
+        # point offsets from (xmin, ymin)), so no per-value JSON text is built;
+        # orjson handles the small x/y centre arrays natively
+        return ORJSONResponse({
             "nx": nx, "ny": ny,
             "xmin": float(xmin), "ymin": float(ymin),
             "cell": float(grid_size),
@@ -317,14 +442,244 @@ async def comparison(
             "x": x, "y": y,
             "coord_units": coord_units,
             "mean_lat": None,
-            "orig": _to_jsonable(arr_orig),
-            "dl":   _to_jsonable(arr_dl),
-            "cmp":  _to_jsonable(arr_cmp),
-            "original_points": o_pts,
-            "dl_points": d_pts,
-        }
+            "grid_dtype": GRID_WIRE_DTYPE,
+            "orig_b64": _grid_b64(arr_orig),
+            "dl_b64":   _grid_b64(arr_dl),
+            "cmp_b64":  _grid_b64(arr_cmp),
+            "original_points_b64": _points_b64(o_pts, xmin, ymin),
+            "dl_points_b64": _points_b64(d_pts, xmin, ymin),
+        })
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+CSV_CHUNK_CELLS = 1 << 16
+
+def _grid_csv_chunks(g: dict, method: str, chunk: int = CSV_CHUNK_CELLS):
+    """
+    Yield the comparison grid as CSV text, one block of cells at a time.
+    Each block is built and formatted on its own, so peak memory stays at one
+    block rather than the whole table, and the first bytes go out immediately.
+    """
+    nx, ny, cell = g["nx"], g["ny"], g["cell"]
+    flat = [g["arr_orig"].reshape(-1), g["arr_dl"].reshape(-1), g["arr_cmp"].reshape(-1)]
+    for start in range(0, nx * ny, chunk):
+        cell_id = np.arange(start, min(start + chunk, nx * ny), dtype=np.int64)
+        iy, ix = np.divmod(cell_id, nx)
+        block = pd.DataFrame({
+            "cell_id": cell_id,
+            "grid_ix": ix,
+            "grid_iy": iy,
+            "centroid_x": g["xmin"] + (ix + 0.5) * cell,
+            "centroid_y": g["ymin"] + (iy + 0.5) * cell,
+            f"orig_{method}": flat[0][cell_id],
+            f"dl_{method}": flat[1][cell_id],
+            "delta": flat[2][cell_id],
+        })
+        yield block.to_csv(index=False, header=start == 0)
+
+@router.post("/export/grid-csv")
+async def export_grid_csv(
+    original_file: UploadFile = File(...),
+    dl_file: UploadFile = File(...),
+    original_northing: str = Form(...),
+    original_easting: str  = Form(...),
+    original_assay: str    = Form(...),
+    dl_northing: str       = Form(...),
+    dl_easting: str        = Form(...),
+    dl_assay: str          = Form(...),
+    method: Literal["mean","median","max"] = Form(...),
+    grid_size: float       = Form(...),
+    treat_as: Literal["auto","meters","degrees"] = Form("auto"),
+):
+    """Stream the per-cell comparison grid (same grid as /comparison) as CSV."""
+    try:
+        g = await _build_grid(original_file, dl_file,
+                              original_easting, original_northing, original_assay,
+                              dl_easting, dl_northing, dl_assay,
+                              method, grid_size, treat_as)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    # sync generator: Starlette iterates it on its threadpool, off the loop
+    return StreamingResponse(
+        _grid_csv_chunks(g, method),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=comparison_grid_{method}.csv"},
+    )
+
+def _png_bytes(fig: Figure, **layout) -> bytes:
+    buf = io.BytesIO()
+    fig.tight_layout(**layout)
+    fig.savefig(buf, format="png", dpi=150)
+    return buf.getvalue()
+
+def _render_distribution_pngs(df_o: pd.DataFrame, df_d: pd.DataFrame,
+                              original_assay: str, dl_assay: str,
+                              flags: SelectedPlots) -> list[tuple[str, bytes]]:
+    """
+    The /export/plots histograms and QQ plot that `flags` selects, as (name, PNG).
+    Runs on the compute pool, so figures use the Figure API, not pyplot.
+    """
+    s_o = _clean_series(df_o, original_assay)
+    s_d = _clean_series(df_d, dl_assay)
+    images: list[tuple[str, bytes]] = []
+
+    for selected, s, title, assay, name in (
+        (flags.originalHistogram, s_o, f"Original {original_assay} Distribution", original_assay, "original_histogram.png"),
+        (flags.dlHistogram, s_d, f"DL {dl_assay} Distribution", dl_assay, "dl_histogram.png"),
+    ):
+        if not selected:
+            continue
+        fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot(111)
+        bins = np.logspace(np.log10(s.min()), np.log10(s.max()), 50)
+        ax.hist(s, bins=bins, color="#7C3AED", edgecolor="black", linewidth=0.5)
+        ax.set_xscale("log")
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xlabel(assay, fontsize=12); ax.set_ylabel("Count", fontsize=12)
+        ax.grid(True, alpha=0.3, linewidth=0.5)
+        images.append((name, _png_bytes(fig)))
+
+    if flags.qqPlot:
+        q = np.linspace(0.01, 0.99, 50)
+        qo = _qq_quantiles(s_o, q); qd = _qq_quantiles(s_d, q)
+        fig = Figure(figsize=(8, 8))
+        ax = fig.add_subplot(111)
+        ax.scatter(qo, qd, s=20, color="#7C3AED")
+        line = np.linspace(min(qo.min(), qd.min()), max(qo.max(), qd.max()), 100)
+        ax.plot(line, line, "--", linewidth=1, color="black")
+        ax.set_xscale("log"); ax.set_yscale("log")
+        ax.set_title("QQ Plot (log–log): Original vs DL", fontsize=14, fontweight='bold')
+        ax.set_xlabel(f"Original {original_assay} quantiles", fontsize=12)
+        ax.set_ylabel(f"DL {dl_assay} quantiles", fontsize=12)
+        ax.grid(True, alpha=0.3, linewidth=0.5)
+        images.append(("qq_plot.png", _png_bytes(fig)))
+
+    return images
+
+def _superscript(n) -> str:
+    """Convert number to superscript text"""
+    superscript_map = {
+        "-": "⁻", "0": "⁰", "1": "¹", "2": "²", "3": "³", "4": "⁴",
+        "5": "⁵", "6": "⁶", "7": "⁷", "8": "⁸", "9": "⁹"
+    }
+    return ''.join(superscript_map.get(c, c) for c in str(n))
+
+def _data_range(data: np.ndarray) -> Tuple[float, float]:
+    """Calculate min/max range for linear data"""
+    finite_data = data[np.isfinite(data)]
+    if len(finite_data) == 0:
+        return 0, 1
+    return float(np.min(finite_data)), float(np.max(finite_data))
+
+def _log_range(data: np.ndarray) -> Tuple[float, float]:
+    """Calculate min/max range for log-scale data"""
+    finite_positive = data[np.isfinite(data) & (data > 0)]
+    if len(finite_positive) == 0:
+        return -2, 3
+    log_data = np.log10(finite_positive)
+    return float(np.floor(np.min(log_data))), float(np.ceil(np.max(log_data)))
+
+def _legend_range(plot_type: str, data: np.ndarray, method: str, legend_config: dict | None):
+    """(vmin, vmax, ticks, tick_labels) from the legend configuration and method"""
+    config = legend_config.get(plot_type) if legend_config else None
+    auto = config is None or config["auto"]
+    fixed = config is not None and not config["auto"] and config["min"] is not None and config["max"] is not None
+
+    if plot_type == "comparison":
+        if method == "max" and auto:
+            return -100, 100, None, None
+        if fixed:
+            return config["min"], config["max"], None, None
+        min_val, max_val = _data_range(data)
+        padding = max(0.1 * (max_val - min_val), 0.1)
+        return min_val - padding, max_val + padding, None, None
+
+    lo, hi = (config["min"], config["max"]) if fixed else _log_range(data)
+    ticks = list(range(int(lo), int(hi) + 1))
+    return lo, hi, ticks, [f'10{_superscript(i)}' for i in ticks]
+
+def _heatmap_png(z: np.ndarray, extent: list, cmap, vmin, vmax, points: list[np.ndarray],
+                 title: str, cbar_label: str, ticks, tick_labels=None) -> bytes:
+    fig = Figure(figsize=(12, 7)); ax = fig.add_subplot(111)
+    im = ax.imshow(z.T, origin="lower", extent=extent,
+                   aspect="equal", cmap=cmap, vmin=vmin, vmax=vmax)
+    # Add black dots for data points
+    for pts in points:
+        ax.scatter(pts[:, 0], pts[:, 1], c='black', s=4, alpha=0.7, marker='o')
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.set_xlabel("Easting (m)", fontsize=12)
+    ax.set_ylabel("Northing (m)", fontsize=12)
+
+    # Format axes with thousands separators
+    ax.ticklabel_format(style='plain', axis='both')
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, p: f'{x:,.0f}'))
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'{x:,.0f}'))
+
+    # Rotate x-axis labels to prevent overlap
+    setp(ax.get_xticklabels(), rotation=45, ha='right')
+
+    # Add grid
+    ax.grid(True, alpha=0.3, linewidth=0.5)
+
+    # Create colorbar with proper formatting
+    cbar = fig.colorbar(im, ax=ax, label=cbar_label)
+    cbar.set_label(cbar_label, fontsize=12)
+    if ticks:
+        cbar.set_ticks(ticks)
+        if tick_labels:
+            cbar.set_ticklabels(tick_labels)
+    return _png_bytes(fig, pad=2.0)
+
+# Same diverging colorscale as the interactive comparison plot
+_COMPARISON_CMAP = LinearSegmentedColormap.from_list(
+    'custom_diverging',
+    ['#a50026', '#d73027', '#f46d43', '#fdae61', '#fee090',
+     '#ffffbf', '#e0f3f8', '#abd9e9', '#74add1', '#4575b4', '#313695'],
+    N=11)
+
+def _render_heatmap_pngs(g: dict, flags: SelectedPlots, method: str, legend_config: dict | None,
+                         original_assay: str, dl_assay: str) -> list[tuple[str, bytes]]:
+    """
+    The /export/plots heatmaps that `flags` selects for a _build_grid result,
+    as (name, PNG). Runs on the compute pool, so figures use the Figure API.
+    """
+    nx, ny, cell = g["nx"], g["ny"], g["cell"]
+    x = g["xmin"] + (np.arange(nx) + 0.5) * cell
+    y = g["ymin"] + (np.arange(ny) + 0.5) * cell
+    extent = [x.min(), x.max(), y.min(), y.max()]
+    images: list[tuple[str, bytes]] = []
+
+    for selected, plot_type, arr, pts, title, assay, name in (
+        (flags.originalHeatmap, "original", g["arr_orig"], g["orig_xy"], "Original (log10)", original_assay, "original_heatmap.png"),
+        (flags.dlHeatmap, "dl", g["arr_dl"], g["d_pts"], "DL (log10)", dl_assay, "dl_heatmap.png"),
+    ):
+        if not selected:
+            continue
+        z = np.where(np.isfinite(arr) & (arr > 0), np.log10(arr), np.nan)
+        vmin, vmax, ticks, tick_labels = _legend_range(plot_type, arr, method, legend_config)
+        images.append((name, _heatmap_png(z, extent, "viridis", vmin, vmax, [pts], title,
+                                          f"Max {assay} (log scale)", ticks, tick_labels)))
+
+    if flags.comparisonHeatmap:
+        arr_cmp = g["arr_cmp"]
+        vmin, vmax, _, _ = _legend_range("comparison", arr_cmp, method, legend_config)
+        # Default ticks for comparison plot
+        tick_range = max(abs(vmin), abs(vmax))
+        if tick_range <= 100:
+            ticks = [-100, -75, -50, -25, 0, 25, 50, 75, 100]
+        else:
+            # Generate ticks based on range
+            step = tick_range / 4
+            ticks = [vmin + i * step for i in range(5)]
+        images.append(("comparison_heatmap.png",
+                       _heatmap_png(arr_cmp, extent, _COMPARISON_CMAP, vmin, vmax, [g["o_pts"], g["d_pts"]],
+                                    "Comparison (DL − Original)", "Δ Te_ppm", ticks)))
+
+    return images
 
 @router.post("/export/plots")
 async def export_plots(
@@ -348,361 +703,35 @@ async def export_plots(
     Histogram + QQ use assay columns only.
     Heatmaps reuse the same gridding logic as /comparison.
     """
-    import io, json, zipfile
+    import zipfile
 
     try:
-        flags = json.loads(selected_plots)  # { originalHistogram: bool, ... }
-        
-        # Parse legend configuration if provided
-        legend_config = json.loads(legend_config) if legend_config else None
-        if legend_config:
-            # Set defaults for missing values
-            default_config = {
-                "original": {"min": None, "max": None, "auto": True},
-                "dl": {"min": None, "max": None, "auto": True},
-                "comparison": {"min": None, "max": None, "auto": True}
-            }
-            for plot_type in ["original", "dl", "comparison"]:
-                if plot_type not in legend_config:
-                    legend_config[plot_type] = default_config[plot_type]
-                else:
-                    for key in ["min", "max", "auto"]:
-                        if key not in legend_config[plot_type]:
-                            legend_config[plot_type][key] = default_config[plot_type][key]
+        # one validating parse each; missing flags are off and missing legend fields are auto
+        flags = SelectedPlots.model_validate_json(selected_plots)
+        legend_config = LegendConfig.model_validate_json(legend_config).model_dump() if legend_config else None
 
         images: list[tuple[str, bytes]] = []
 
         # ---- 1) Histograms + QQ (if requested) ----
-        if flags.get("originalHistogram") or flags.get("dlHistogram") or flags.get("qqPlot"):
-            df_o = dataframe_from_upload_cols(original_file, [original_assay])
-            df_d = dataframe_from_upload_cols(dl_file, [dl_assay])
-
-            s_o = pd.to_numeric(df_o[original_assay], errors="coerce").dropna()
-            s_o = s_o[s_o > 0]
-            s_d = pd.to_numeric(df_d[dl_assay], errors="coerce").dropna()
-            s_d = s_d[s_d > 0]
-
-            if flags.get("originalHistogram"):
-                fig = plt.figure(figsize=(10, 6))
-                ax = fig.add_subplot(111)
-                bins = np.logspace(np.log10(s_o.min()), np.log10(s_o.max()), 50)
-                ax.hist(s_o, bins=bins, color="#7C3AED", edgecolor="black", linewidth=0.5)
-                ax.set_xscale("log")
-                ax.set_title(f"Original {original_assay} Distribution", fontsize=14, fontweight='bold')
-                ax.set_xlabel(original_assay, fontsize=12); ax.set_ylabel("Count", fontsize=12)
-                ax.grid(True, alpha=0.3, linewidth=0.5)
-                buf = io.BytesIO(); fig.tight_layout(); fig.savefig(buf, format="png", dpi=150)
-                plt.close(fig); buf.seek(0)
-                images.append(("original_histogram.png", buf.read()))
-
-            if flags.get("dlHistogram"):
-                fig = plt.figure(figsize=(10, 6))
-                ax = fig.add_subplot(111)
-                bins = np.logspace(np.log10(s_d.min()), np.log10(s_d.max()), 50)
-                ax.hist(s_d, bins=bins, color="#7C3AED", edgecolor="black", linewidth=0.5)
-                ax.set_xscale("log")
-                ax.set_title(f"DL {dl_assay} Distribution", fontsize=14, fontweight='bold')
-                ax.set_xlabel(dl_assay, fontsize=12); ax.set_ylabel("Count", fontsize=12)
-                ax.grid(True, alpha=0.3, linewidth=0.5)
-                buf = io.BytesIO(); fig.tight_layout(); fig.savefig(buf, format="png", dpi=150)
-                plt.close(fig); buf.seek(0)
-                images.append(("dl_histogram.png", buf.read()))
-
-            if flags.get("qqPlot"):
-                q = np.linspace(0.01, 0.99, 50)
-                qo = np.quantile(s_o, q); qd = np.quantile(s_d, q)
-                fig = plt.figure(figsize=(8, 8))
-                ax = fig.add_subplot(111)
-                ax.scatter(qo, qd, s=20, color="#7C3AED")
-                line = np.linspace(min(qo.min(), qd.min()), max(qo.max(), qd.max()), 100)
-                ax.plot(line, line, "--", linewidth=1, color="black")
-                ax.set_xscale("log"); ax.set_yscale("log")
-                ax.set_title("QQ Plot (log–log): Original vs DL", fontsize=14, fontweight='bold')
-                ax.set_xlabel(f"Original {original_assay} quantiles", fontsize=12)
-                ax.set_ylabel(f"DL {dl_assay} quantiles", fontsize=12)
-                ax.grid(True, alpha=0.3, linewidth=0.5)
-                buf = io.BytesIO(); fig.tight_layout(); fig.savefig(buf, format="png", dpi=150)
-                plt.close(fig); buf.seek(0)
-                images.append(("qq_plot.png", buf.read()))
+        if flags.originalHistogram or flags.dlHistogram or flags.qqPlot:
+            df_o, df_d = await _read_both(original_file, dl_file, [original_assay], [dl_assay])
+            images += await run_cpu(_render_distribution_pngs, df_o, df_d, original_assay, dl_assay, flags)
 
         # ---- 2) Heatmaps (if any heatmap was requested) ----
-        if flags.get("originalHeatmap") or flags.get("dlHeatmap") or flags.get("comparisonHeatmap"):
+        if flags.originalHeatmap or flags.dlHeatmap or flags.comparisonHeatmap:
             # Require the mapping + grid params
             required = [original_northing, original_easting, dl_northing, dl_easting, method, grid_size]
             if any(v in (None, "") for v in required):
                 raise HTTPException(status_code=400, detail="Heatmaps selected but missing mapping/method/grid parameters.")
 
-            # Reuse the same data cleaning + projection + gridding as /comparison
-            # (these helpers already exist above in this file)
-            df_o = dataframe_from_upload_cols(original_file, [original_easting, original_northing, original_assay])
-            df_d = dataframe_from_upload_cols(dl_file, [dl_easting, dl_northing, dl_assay])
-
-            # clean
-            def _to_float(df, cols):
-                df = df.copy()
-                for c in cols:
-                    df[c] = pd.to_numeric(df[c], errors="coerce")
-                return df.dropna()
-
-            df_o = _to_float(df_o, [original_easting, original_northing, original_assay])
-            df_d = _to_float(df_d, [dl_easting, dl_northing, dl_assay])
-            df_o = df_o[df_o[original_assay] > 0]
-            df_d = df_d[df_d[dl_assay] > 0]
-            if df_o.empty or df_d.empty:
-                raise HTTPException(status_code=400, detail="No valid rows after cleaning for heatmaps.")
-
-            # decide units and possibly project (same logic as /comparison)
-            def _looks_like_degrees(east: pd.Series, north: pd.Series) -> bool:
-                return bool(east.between(-180, 180).all() and north.between(-90, 90).all())
-
-            looks_deg = _looks_like_degrees(
-                pd.concat([df_o[original_easting], df_d[dl_easting]], ignore_index=True),
-                pd.concat([df_o[original_northing], df_d[dl_northing]], ignore_index=True),
-            )
-            use_degrees = looks_deg  # treat_as="auto"
-
-            if use_degrees:
-                transformer = Transformer.from_crs("EPSG:4326", "EPSG:3577", always_xy=True)
-                ex_o, ny_o = transformer.transform(df_o[original_easting].values, df_o[original_northing].values)
-                ex_d, ny_d = transformer.transform(df_d[dl_easting].values, df_d[dl_northing].values)
-                df_o["__E_m"], df_o["__N_m"] = ex_o, ny_o
-                df_d["__E_m"], df_d["__N_m"] = ex_d, ny_d
-                e_col_o, n_col_o = "__E_m", "__N_m"
-                e_col_d, n_col_d = "__E_m", "__N_m"
-            else:
-                e_col_o, n_col_o = original_easting, original_northing
-                e_col_d, n_col_d = dl_easting, dl_northing
-
-            # grid meta (same math as /comparison)
-            def _grid_meta_xy(east, north, cell_x, cell_y):
-                xmin = float(np.floor(east.min() / cell_x) * cell_x)
-                ymin = float(np.floor(north.min() / cell_y) * cell_y)
-                nx = int(((east.max() - xmin) // cell_x) + 1)
-                ny = int(((north.max() - ymin) // cell_y) + 1)
-                return xmin, ymin, nx, ny
-
-            cell_x = cell_y = float(grid_size)
-            xmin, ymin, nx, ny = _grid_meta_xy(
-                pd.concat([df_o[e_col_o], df_d[e_col_d]], ignore_index=True),
-                pd.concat([df_o[n_col_o], df_d[n_col_d]], ignore_index=True),
-                cell_x, cell_y
-            )
-
-            # index into grid and rename assay to Te_ppm to match comparison convention
-            def _index_cols_xy(df, easting, northing, xmin, ymin, cell_x, cell_y):
-                df = df.copy()
-                df["grid_ix"] = ((df[easting] - xmin) // cell_x).astype(int)
-                df["grid_iy"] = ((df[northing] - ymin) // cell_y).astype(int)
-                return df
-
-            o_idx = _index_cols_xy(df_o, e_col_o, n_col_o, xmin, ymin, cell_x, cell_y).rename(columns={original_assay: "Te_ppm"})
-            d_idx = _index_cols_xy(df_d, e_col_d, n_col_d, xmin, ymin, cell_x, cell_y).rename(columns={dl_assay: "Te_ppm"})
-
-            # aggregate via registry (same as /comparison)
-            fn = COMPARISON_METHODS[method]  # type: ignore[arg-type]
-            arr_orig, arr_dl, arr_cmp = fn(d_idx, o_idx, nx, ny)
-
-            # draw heatmaps
-            x = xmin + (np.arange(nx) + 0.5) * cell_x
-            y = ymin + (np.arange(ny) + 0.5) * cell_y
-
-            # Downsample overlay points (same as interactive plots)
-            def _downsample(df, n=5000):
-                return df.sample(n=min(n, len(df)), random_state=42)
-            o_pts = _downsample(o_idx)[[e_col_o, n_col_o]].values
-            d_pts = _downsample(d_idx)[[e_col_d, n_col_d]].values
-
-            def _save_fig(fig, name):
-                b = io.BytesIO(); fig.tight_layout(pad=2.0); fig.savefig(b, format="png", dpi=150); plt.close(fig); b.seek(0)
-                images.append((name, b.read()))
-            
-            # Helper functions for dynamic legend scaling
-            def calculate_data_range(data):
-                """Calculate min/max range for linear data"""
-                finite_data = data[np.isfinite(data)]
-                if len(finite_data) == 0:
-                    return 0, 1
-                return float(np.min(finite_data)), float(np.max(finite_data))
-            
-            def calculate_log_range(data):
-                """Calculate min/max range for log-scale data"""
-                finite_positive = data[np.isfinite(data) & (data > 0)]
-                if len(finite_positive) == 0:
-                    return -2, 3
-                log_data = np.log10(finite_positive)
-                return float(np.floor(np.min(log_data))), float(np.ceil(np.max(log_data)))
-            
-            def get_legend_range(plot_type, data, method):
-                """Get legend range based on configuration and method"""
-                if not legend_config or plot_type not in legend_config:
-                    # Default behavior
-                    if plot_type == "comparison":
-                        if method == "max":
-                            return -100, 100, None, None
-                        else:
-                            min_val, max_val = calculate_data_range(data)
-                            padding = max(0.1 * (max_val - min_val), 0.1)
-                            return min_val - padding, max_val + padding, None, None
-                    else:
-                        min_log, max_log = calculate_log_range(data)
-                        ticks = list(range(int(min_log), int(max_log) + 1))
-                        tick_labels = [f'10{superscript(i)}' for i in ticks]
-                        return min_log, max_log, ticks, tick_labels
-                
-                config = legend_config[plot_type]
-                
-                if plot_type == "comparison":
-                    if method == "max" and config["auto"]:
-                        return -100, 100, None, None
-                    elif not config["auto"] and config["min"] is not None and config["max"] is not None:
-                        return config["min"], config["max"], None, None
-                    else:
-                        min_val, max_val = calculate_data_range(data)
-                        padding = max(0.1 * (max_val - min_val), 0.1)
-                        return min_val - padding, max_val + padding, None, None
-                else:
-                    if not config["auto"] and config["min"] is not None and config["max"] is not None:
-                        ticks = list(range(int(config["min"]), int(config["max"]) + 1))
-                        tick_labels = [f'10{superscript(i)}' for i in ticks]
-                        return config["min"], config["max"], ticks, tick_labels
-                    else:
-                        min_log, max_log = calculate_log_range(data)
-                        ticks = list(range(int(min_log), int(max_log) + 1))
-                        tick_labels = [f'10{superscript(i)}' for i in ticks]
-                        return min_log, max_log, ticks, tick_labels
-            
-            def superscript(n):
-                """Convert number to superscript text"""
-                superscript_map = {
-                    "-": "⁻", "0": "⁰", "1": "¹", "2": "²", "3": "³", "4": "⁴",
-                    "5": "⁵", "6": "⁶", "7": "⁷", "8": "⁸", "9": "⁹"
-                }
-                return ''.join(superscript_map.get(c, c) for c in str(n))
-
-            if flags.get("originalHeatmap"):
-                fig = plt.figure(figsize=(12, 7)); ax = fig.add_subplot(111)
-                z = np.where(np.isfinite(arr_orig) & (arr_orig > 0), np.log10(arr_orig), np.nan)
-                
-                # Get dynamic legend range
-                vmin, vmax, ticks, tick_labels = get_legend_range("original", arr_orig, method)
-                
-                im = ax.imshow(z.T, origin="lower", extent=[x.min(), x.max(), y.min(), y.max()], 
-                              aspect="equal", cmap="viridis", vmin=vmin, vmax=vmax)
-                # Add black dots for data points
-                ax.scatter(df_o[e_col_o], df_o[n_col_o], c='black', s=4, alpha=0.7, marker='o')
-                ax.set_title("Original (log10)", fontsize=14, fontweight='bold')
-                ax.set_xlabel("Easting (m)", fontsize=12)
-                ax.set_ylabel("Northing (m)", fontsize=12)
-                
-                # Format axes with thousands separators
-                ax.ticklabel_format(style='plain', axis='both')
-                ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-                ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-                
-                # Rotate x-axis labels to prevent overlap
-                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-                
-                # Add grid
-                ax.grid(True, alpha=0.3, linewidth=0.5)
-                
-                # Create colorbar with proper formatting
-                cbar = fig.colorbar(im, ax=ax, label=f"Max {original_assay} (log scale)")
-                cbar.set_label(f"Max {original_assay} (log scale)", fontsize=12)
-                # Set colorbar ticks dynamically
-                if ticks and tick_labels:
-                    cbar.set_ticks(ticks)
-                    cbar.set_ticklabels(tick_labels)
-                
-                _save_fig(fig, "original_heatmap.png")
-
-            if flags.get("dlHeatmap"):
-                fig = plt.figure(figsize=(12, 7)); ax = fig.add_subplot(111)
-                z = np.where(np.isfinite(arr_dl) & (arr_dl > 0), np.log10(arr_dl), np.nan)
-                
-                # Get dynamic legend range
-                vmin, vmax, ticks, tick_labels = get_legend_range("dl", arr_dl, method)
-                
-                im = ax.imshow(z.T, origin="lower", extent=[x.min(), x.max(), y.min(), y.max()], 
-                              aspect="equal", cmap="viridis", vmin=vmin, vmax=vmax)
-                # Add black dots for data points
-                ax.scatter(d_pts[:, 0], d_pts[:, 1], c='black', s=4, alpha=0.7, marker='o')
-                ax.set_title("DL (log10)", fontsize=14, fontweight='bold')
-                ax.set_xlabel("Easting (m)", fontsize=12)
-                ax.set_ylabel("Northing (m)", fontsize=12)
-                
-                # Format axes with thousands separators
-                ax.ticklabel_format(style='plain', axis='both')
-                ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-                ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-                
-                # Rotate x-axis labels to prevent overlap
-                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-                
-                # Add grid
-                ax.grid(True, alpha=0.3, linewidth=0.5)
-                
-                # Create colorbar with proper formatting
-                cbar = fig.colorbar(im, ax=ax, label=f"Max {dl_assay} (log scale)")
-                cbar.set_label(f"Max {dl_assay} (log scale)", fontsize=12)
-                # Set colorbar ticks dynamically
-                if ticks and tick_labels:
-                    cbar.set_ticks(ticks)
-                    cbar.set_ticklabels(tick_labels)
-                
-                _save_fig(fig, "dl_heatmap.png")
-
-            if flags.get("comparisonHeatmap"):
-                fig = plt.figure(figsize=(12, 7)); ax = fig.add_subplot(111)
-                
-                # Get dynamic legend range
-                vmin, vmax, ticks, tick_labels = get_legend_range("comparison", arr_cmp, method)
-                
-                # Use the same custom colorscale as the interactive plot
-                from matplotlib.colors import LinearSegmentedColormap
-                colors = ['#a50026', '#d73027', '#f46d43', '#fdae61', '#fee090', 
-                         '#ffffbf', '#e0f3f8', '#abd9e9', '#74add1', '#4575b4', '#313695']
-                n_bins = len(colors)
-                custom_cmap = LinearSegmentedColormap.from_list('custom_diverging', colors, N=n_bins)
-                
-                im = ax.imshow(arr_cmp.T, origin="lower", vmin=vmin, vmax=vmax, cmap=custom_cmap,
-                               extent=[x.min(), x.max(), y.min(), y.max()], aspect="equal")
-                # Add black dots for both original and DL data points
-                ax.scatter(o_pts[:, 0], o_pts[:, 1], c='black', s=4, alpha=0.7, marker='o', label='Original')
-                ax.scatter(d_pts[:, 0], d_pts[:, 1], c='black', s=4, alpha=0.7, marker='o', label='DL')
-                ax.set_title("Comparison (DL − Original)", fontsize=14, fontweight='bold')
-                ax.set_xlabel("Easting (m)", fontsize=12)
-                ax.set_ylabel("Northing (m)", fontsize=12)
-                
-                # Format axes with thousands separators
-                ax.ticklabel_format(style='plain', axis='both')
-                ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-                ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-                
-                # Rotate x-axis labels to prevent overlap
-                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-                
-                # Add grid
-                ax.grid(True, alpha=0.3, linewidth=0.5)
-                
-                # Create colorbar with proper formatting
-                cbar = fig.colorbar(im, ax=ax, label="Δ Te_ppm")
-                cbar.set_label("Δ Te_ppm", fontsize=12)
-                # Set colorbar ticks dynamically
-                if ticks and tick_labels:
-                    cbar.set_ticks(ticks)
-                    cbar.set_ticklabels(tick_labels)
-                else:
-                    # Default ticks for comparison plot
-                    tick_range = max(abs(vmin), abs(vmax))
-                    if tick_range <= 100:
-                        cbar.set_ticks([-100, -75, -50, -25, 0, 25, 50, 75, 100])
-                    else:
-                        # Generate ticks based on range
-                        step = tick_range / 4
-                        ticks = [vmin + i * step for i in range(5)]
-                        cbar.set_ticks(ticks)
-                
-                _save_fig(fig, "comparison_heatmap.png")
+            # Same cleaning + projection + gridding as /comparison; served from the
+            # cache when the interactive view already built this grid
+            g = await _build_grid(original_file, dl_file,
+                                  original_easting, original_northing, original_assay,
+                                  dl_easting, dl_northing, dl_assay,
+                                  method, grid_size)
+            images += await run_cpu(_render_heatmap_pngs, g, flags, method, legend_config,
+                                    original_assay, dl_assay)
 
         # ---- 3) Package everything requested into a ZIP ----
         if not images:
@@ -721,6 +750,8 @@ async def export_plots(
 
     except HTTPException:
         raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e: 
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1,5 +1,8 @@
+import asyncio
+
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from app.models.schemas import ColumnsResponse
+from app.services.compute_pool import run_cpu
 from app.services.io_service import extract_columns, make_run_token
 
 router = APIRouter(prefix="/api/data", tags=["data"])
@@ -10,9 +13,9 @@ async def get_columns(
     dl: UploadFile       = File(..., description="DL Data .csv, .dbf or .zip"),
 ):
     try:
-        original_cols = extract_columns(original)
-        dl_cols = extract_columns(dl)
+        # header reads are independent; run both on the compute pool at once
+        original_cols, dl_cols = await asyncio.gather(run_cpu(extract_columns, original),
+                                                      run_cpu(extract_columns, dl))
         return ColumnsResponse(original_columns=original_cols, dl_columns=dl_cols, run_token=make_run_token())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-        raise HTTPException(status_code=400, detail=str(e)) 
@@ -0,0 +1,258 @@
+# app/services/cache_service.py
+"""
+Small caches for parsed uploads and built grid comparisons.
+
+/comparison and /export/plots are called with the same uploads and the same
+mapping/method/grid parameters, so the export can reuse the grid the
+interactive view just built instead of re-reading and re-aggregating both
+files. Entries are keyed by a content digest of each upload plus the
+parameters.
+
+Two tiers:
+- RAM: live entries, bounded by MAX_BYTES of array payload and MAX_ENTRIES;
+  the least recently used are dropped first, and entries idle for longer
+  than TTL_SECONDS are dropped lazily on the next get/put.
+- Disk: every entry is also written as one .npy blob per field under a
+  directory shared by all workers (CACHE_DIR, or $GRID_CACHE_DIR), named by
+  the hash of CACHE_VERSION and the key. A RAM miss memory-maps the blobs
+  read-only, so a worker can serve a grid another worker built, and the OS
+  page cache shares the pages between them. At most MAX_SPILLED entries are
+  kept; the least recently used go first, and entries unused for longer than
+  TTL_SECONDS are treated as misses and removed. The directory is created
+  private (0o700); if it exists but is not private to this user, the disk
+  tier is skipped.
+  Bump CACHE_VERSION whenever the cached grid layout or the code that builds
+  it changes, so stale blobs from an older deploy are never served.
+
+Parsed upload frames are kept in a separate RAM-only LRU (PARSED_MAX_*),
+keyed by the same content digest plus the columns read, so /summary,
+/plots, /plots-data and /comparison on the same files parse each once.
+
+Cached numpy arrays are read-only, so concurrent requests can share the same
+buffers without copying and without one of them mutating the others' result.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import UploadFile
+
+logger = logging.getLogger("cache_service")
+
+MAX_ENTRIES = 8
+MAX_BYTES = 256 << 20  # 256 MiB of cached arrays in RAM
+MAX_SPILLED = 32
+TTL_SECONDS = 30 * 60
+HASH_CHUNK = 1 << 20
+CACHE_DIR = os.environ.get("GRID_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "grid-cache")
+CACHE_VERSION = 1
+
+PARSED_MAX_ENTRIES = 8
+PARSED_MAX_BYTES = 512 << 20  # 512 MiB of parsed upload frames
+
+
+class _RamLRU:
+    """Thread-safe LRU of values bounded by entry count and size, with an idle TTL."""
+
+    def __init__(self, max_entries: int, max_bytes: int, sizeof: Callable[[Any], int]):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        # key -> (last used, monotonic seconds; size from put; value); least recently used first
+        self._items: "OrderedDict[Hashable, tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, key: Hashable) -> None:
+        self._bytes -= self._items.pop(key)[1]
+
+    def _expire(self, now: float) -> None:
+        # recency order == last-used order, so expired entries sit at the front
+        while self._items:
+            key, (used, _, _) = next(iter(self._items.items()))
+            if now - used <= TTL_SECONDS:
+                break
+            self._drop(key)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            self._items[key] = (now, entry[1], entry[2])
+            self._items.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._expire(now)
+            self._items[key] = (now, size, value)
+            self._bytes += size
+            # evict least recently used first; always keep the new entry
+            while len(self._items) > 1 and (len(self._items) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._items)))
+
+
+def upload_digest(upload: UploadFile) -> str:
+    """Hash the upload's spooled file in chunks and rewind it for the reader."""
+    h = hashlib.blake2b(digest_size=16)
+    fh = upload.file
+    fh.seek(0)
+    for chunk in iter(lambda: fh.read(HASH_CHUNK), b""):
+        h.update(chunk)
+    fh.seek(0)
+    return h.hexdigest()
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return 0
+
+
+def _frame_nbytes(df: pd.DataFrame) -> int:
+    # deep: text columns are Python objects, and are most of a wide CSV's footprint
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+_STORE = _RamLRU(MAX_ENTRIES, MAX_BYTES, _nbytes)
+_PARSED = _RamLRU(PARSED_MAX_ENTRIES, PARSED_MAX_BYTES, _frame_nbytes)
+
+
+def _entry_dir(key: Hashable) -> str:
+    name = hashlib.blake2b(repr((CACHE_VERSION, key)).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(CACHE_DIR, name)
+
+
+def _write_blobs(key: Hashable, value: Any) -> None:
+    """Write a dict of arrays/scalars as one .npy per field; anything else stays RAM-only."""
+    if not isinstance(value, dict):
+        return
+    final = _entry_dir(key)
+    if os.path.isdir(final):
+        return
+    tmp = f"{final}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.makedirs(tmp, exist_ok=True)
+        for field, v in value.items():
+            np.save(os.path.join(tmp, f"{field}.npy"), np.asarray(v), allow_pickle=False)
+        os.rename(tmp, final)  # atomic publish; loses harmlessly to a concurrent writer
+    except OSError as e:
+        if not os.path.isdir(final):
+            logger.warning("Could not write cache entry to %s: %s", final, e)
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    _prune_disk()
+
+
+def _cache_dir_ok() -> bool:
+    """Create CACHE_DIR private to this user; refuse one another user could write to."""
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        st = os.stat(CACHE_DIR)
+        if hasattr(os, "getuid") and st.st_uid == os.getuid() and st.st_mode & 0o077:
+            os.chmod(CACHE_DIR, 0o700)  # ours, but created before the mode was set
+            st = os.stat(CACHE_DIR)
+    except OSError as e:
+        logger.warning("Cache directory %s unavailable: %s", CACHE_DIR, e)
+        return False
+    if hasattr(os, "getuid") and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+        logger.warning("Cache directory %s is not private to this user; disk cache disabled", CACHE_DIR)
+        return False
+    return True
+
+
+def _expired(mtime: float) -> bool:
+    return time.time() - mtime > TTL_SECONDS
+
+
+def _prune_disk() -> None:
+    try:
+        entries = [e for e in os.scandir(CACHE_DIR) if e.is_dir() and ".tmp-" not in e.name]
+    except OSError:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    # oldest first: drop everything past the TTL, then down to MAX_SPILLED
+    n_drop = max(len(entries) - MAX_SPILLED, 0)
+    for i, e in enumerate(entries):
+        if i >= n_drop and not _expired(e.stat().st_mtime):
+            break
+        shutil.rmtree(e.path, ignore_errors=True)
+
+
+def _load_blobs(key: Hashable) -> Optional[dict]:
+    path = _entry_dir(key)
+    try:
+        if _expired(os.stat(path).st_mtime):
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+    except OSError:
+        return None
+    try:
+        value = {}
+        for name in os.listdir(path):
+            if name.endswith(".npy"):
+                # plain ndarray view of the read-only mapping (orjson rejects np.memmap)
+                arr = np.asarray(np.load(os.path.join(path, name), mmap_mode="r", allow_pickle=False))
+                # 0-d arrays were scalars (grid meta) before saving
+                value[name[:-4]] = arr.item() if arr.ndim == 0 else arr
+        os.utime(path)  # mark as recently used for pruning
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load cache entry %s: %s", path, e)
+        return None
+    return value
+
+
+def get_cached(key: Hashable) -> Optional[Any]:
+    hit = _STORE.get(key)
+    if hit is None and _cache_dir_ok():
+        hit = _load_blobs(key)
+        if hit is not None:
+            _put_ram(key, hit)
+    return hit
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    return value
+
+
+def _put_ram(key: Hashable, value: Any) -> None:
+    _STORE.put(key, _freeze(value))
+
+
+def put_cached(key: Hashable, value: Any) -> None:
+    """Store in RAM and write through to the shared disk tier (blocking I/O; call off the loop)."""
+    _put_ram(key, value)
+    if _cache_dir_ok():
+        _write_blobs(key, value)
+
+
+def get_parsed(key: Hashable) -> Optional[pd.DataFrame]:
+    """A previously parsed upload frame (shared: callers must not modify it)."""
+    return _PARSED.get(key)
+
+
+def put_parsed(key: Hashable, df: pd.DataFrame) -> None:
+    _PARSED.put(key, df)
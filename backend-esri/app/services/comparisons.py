@@ -7,6 +7,7 @@ Each function follows the same interface:
     compare_fn(dl_gdf_idx, orig_gdf_idx, nx, ny) -> (arr_orig, arr_dl, arr_cmp)
 
 - dl_gdf_idx:   DataFrame with DL samples + grid_ix/grid_iy columns
+                (and optionally grid_id = grid_iy * nx + grid_ix)
 - orig_gdf_idx: DataFrame with Original samples + grid_ix/grid_iy columns
 - nx, ny:       grid dimensions
 
@@ -21,31 +22,43 @@ import pandas as pd
 
 
 def _fill_stat_array(gdf: pd.DataFrame, nx: int, ny: int, stat: str) -> np.ndarray:
-    """Compute grid-wise stats and return a filled 2D array."""
+    """Compute grid-wise stats ('mean' | 'median' | 'max') and return a filled 2D array."""
     arr = np.full((ny, nx), np.nan, dtype=float)
     if gdf is None or len(gdf) == 0:
         return arr
 
-    # linearize grid cell id
-    gid = gdf["grid_iy"].values * nx + gdf["grid_ix"].values
-    stat_series = (
-        gdf.assign(grid_id=gid)
-           .groupby("grid_id")["Te_ppm"]
-           .agg(stat)  # 'mean' | 'median' | 'max'
-    )
-    if stat_series.empty:
+    # linearized grid cell id; the router precomputes it as a single int64 key
+    if "grid_id" in gdf.columns:
+        gid = gdf["grid_id"].to_numpy(dtype=np.int64)
+    else:
+        gid = gdf["grid_iy"].to_numpy(dtype=np.int64) * nx + gdf["grid_ix"].to_numpy(dtype=np.int64)
+    vals = gdf["Te_ppm"].to_numpy(dtype=float)
+    keep = ~np.isnan(vals)
+    gid, vals = gid[keep], vals[keep]
+    if len(vals) == 0:
         return arr
 
-    iy = (stat_series.index.values // nx).astype(int)
-    ix = (stat_series.index.values % nx).astype(int)
-    arr[iy, ix] = stat_series.values.astype(float)
+    # Reduce on the int64 keys, the same way backend/comparisons/max_per_cell.py
+    # does: fmax.at for max, groupby for mean (pandas' compensated summation)
+    # and median; results are written into the flat view of arr by cell id.
+    flat = arr.reshape(-1)
+    if stat == "max":
+        # scatter-reduce by cell id; NaN-initialised cells without samples stay NaN
+        np.fmax.at(flat, gid, vals)
+    elif stat in ("mean", "median"):
+        res = pd.Series(vals).groupby(gid, sort=False).agg(stat)
+        flat[res.index.to_numpy()] = res.to_numpy()
+    else:
+        raise ValueError(f"Unsupported statistic '{stat}'")
     return arr
 
 
 def _safe_diff(a, b):
-    mask = np.isfinite(a) & np.isfinite(b)
-    out = np.full_like(a, np.nan, dtype=float)
-    out[mask] = b[mask] - a[mask]
+    # one subtract into a preallocated buffer; NaN already propagates, so only
+    # infs need clearing, done in place rather than through a fancy-index copy
+    out = np.empty(np.shape(a), dtype=float)
+    np.subtract(b, a, out=out)
+    np.copyto(out, np.nan, where=np.isinf(out))
     return out
 
 
@@ -0,0 +1,37 @@
+# app/services/compute_pool.py
+"""
+Process-wide thread pool for CPU-bound request work (parsing, gridding,
+stats, plot rendering).
+
+The endpoints are async, so anything heavy run inline blocks the event loop
+for every other request on the worker. The numpy/pyarrow kernels release the
+GIL, so a pool sized to the CPU count lets concurrent requests compute in
+parallel. main.py starts the pool on startup and shuts it down on exit.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def start_pool() -> None:
+    global _POOL
+    if _POOL is None:
+        _POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="compute")
+
+
+def shutdown_pool() -> None:
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=True)
+        _POOL = None
+
+
+async def run_cpu(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run fn(*args, **kwargs) on the compute pool (the loop's default executor if not started)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_POOL, functools.partial(fn, *args, **kwargs))
@@ -1,17 +1,27 @@
 # backend/app/services/io_service.py
 import io
+import codecs
 import zipfile
 import uuid
 import logging
 import tempfile
 import os
-from typing import List, Tuple, Optional
+import shutil
+import struct
+from typing import BinaryIO, List, Tuple, Optional
 
 import chardet  # pip install chardet
 import pandas as pd
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
 from simpledbf import Dbf5  # pip install simpledbf
 
+try:
+    import pyarrow as pa  # pip install pyarrow
+    import pyarrow.csv as pa_csv
+except ImportError:  # optional: fall back to the pandas C parser
+    pa = pa_csv = None
+
 logger = logging.getLogger("io_service")
 if not logger.handlers:
     # Basic console logger
@@ -22,12 +32,85 @@ if not logger.handlers:
 
 ALLOWED = (".csv", ".zip", ".dbf")
 
+# pyarrow parses each block on its own thread
+ARROW_BLOCK_SIZE = 8 << 20  # 8 MiB
+
+# uploads (and the ZIP members they unpack to) above this are rejected with 413
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", "1024")) << 20
+# a request carries up to two uploads plus a few small form fields
+MAX_BODY_BYTES = 2 * MAX_UPLOAD_BYTES + (1 << 20)
+# ZIP members are unpacked into RAM up to this size, then spill to disk
+SPOOL_MAX_BYTES = 32 << 20
+# CSV encoding is decided once from this much of the file
+SNIFF_BYTES = 64 << 10
+
+
+class UploadTooLarge(Exception):
+    """An upload, or the ZIP member it unpacks to, exceeds MAX_UPLOAD_BYTES."""
+
 
 def _safe_name(name: str) -> bool:
     n = (name or "").lower().strip()
     return any(n.endswith(ext) for ext in ALLOWED)
 
 
+def _check_size(nbytes: int, what: str) -> None:
+    if nbytes > MAX_UPLOAD_BYTES:
+        raise UploadTooLarge(f"{what} exceeds the {MAX_UPLOAD_BYTES >> 20} MiB upload limit")
+
+
+class BodySizeLimit:
+    """
+    ASGI middleware bounding request bodies at max_bytes while they stream in.
+    Starlette spools multipart uploads before a handler runs, so a check in the
+    handler only fires after an oversized body has been read in full. Here a
+    declared Content-Length over the cap is refused before any body is read,
+    and a body without one is cut off with 413 as soon as the running count
+    passes the cap.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_BODY_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        detail = f"Request body exceeds the {self.max_bytes >> 20} MiB limit"
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > self.max_bytes:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # raised inside the body parse; FastAPI re-raises HTTPException as is
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _upload_stream(upload: UploadFile) -> BinaryIO:
+    """
+    The upload's spooled file, size-checked and rewound; parsers read it in place.
+    BodySizeLimit has already bounded the whole request; this is the exact
+    per-file limit, taken from the spooled size without reading it again.
+    """
+    src = upload.file
+    src.seek(0, io.SEEK_END)
+    _check_size(src.tell(), f"Upload {upload.filename}")
+    src.seek(0)
+    return src
+
+
 def _detect_encoding(sample: bytes) -> str:
     """
     Detect encoding from a small sample. Fall back sensibly.
@@ -39,6 +122,23 @@ def _detect_encoding(sample: bytes) -> str:
     return enc
 
 
+def _sniff_encoding(src: BinaryIO) -> str:
+    """
+    Pick one encoding for the whole CSV from its first SNIFF_BYTES: UTF-8 when the
+    sample decodes cleanly (BOM-aware), otherwise chardet's guess, else latin-1.
+    """
+    src.seek(0)
+    sample = src.read(SNIFF_BYTES)
+    src.seek(0)
+    try:
+        # final=False: the sample may end mid-way through a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        guess = (chardet.detect(sample).get("encoding") or "").lower()
+        return guess if guess and guess not in ("ascii", "utf-8") else "latin-1"
+    return "utf-8-sig" if sample.startswith(codecs.BOM_UTF8) else "utf-8"
+
+
 def _read_header_from_bytes(raw: bytes) -> List[str]:
     """
     Read only the header row from raw CSV bytes, with robust encoding fallbacks.
@@ -64,38 +164,68 @@ def _read_header_from_bytes(raw: bytes) -> List[str]:
     raise ValueError(f"Could not read header with candidate encodings; last error: {last_err}")
 
 
-def _read_csv_bytes_to_df(raw: bytes) -> pd.DataFrame:
+def _parse_csv(src: BinaryIO, enc: str, usecols: Optional[List[str]] = None) -> pd.DataFrame:
     """
-    Read full CSV to DataFrame with robust encodings.
+    Parse a CSV stream with pyarrow's multi-threaded reader when installed,
+    otherwise (or if pyarrow rejects the file) with the pandas C engine.
+    The stream is read block by block; it is never loaded as one bytes object.
     """
-    candidates = []
-    candidates.append(_detect_encoding(raw[:4096]))
-    for c in ("utf-8-sig", "utf-8", "latin-1"):
-        if c not in candidates:
-            candidates.append(c)
-
-    last_err: Optional[Exception] = None
-    for enc in candidates:
+    if pa_csv is not None:
+        # ASCII is a subset of UTF-8 and pyarrow skips a UTF-8 BOM itself; naming
+        # them "utf8" keeps pyarrow on its native decoder instead of a
+        # Python-level transcoding stream
+        pa_enc = "utf8" if enc.lower() in ("ascii", "utf-8", "utf8", "utf-8-sig") else enc
         try:
-            df = pd.read_csv(io.BytesIO(raw), encoding=enc, low_memory=False)
-            logger.info("DataFrame read with encoding=%s; shape=%s", enc, df.shape)
-            return df
-        except Exception as e:
-            last_err = e
-            logger.warning("DataFrame read failed with encoding=%s: %s", enc, e)
-
-    raise ValueError(f"Could not read CSV with candidate encodings; last error: {last_err}")
+            src.seek(0)
+            table = pa_csv.read_csv(
+                src,
+                read_options=pa_csv.ReadOptions(encoding=pa_enc, use_threads=True, block_size=ARROW_BLOCK_SIZE),
+                convert_options=pa_csv.ConvertOptions(include_columns=usecols or []),
+            )
+            # pyarrow keeps undecodable text as binary instead of failing, which
+            # means the file is not UTF-8 past the sniffed sample
+            if pa_enc == "utf8" and any(pa.types.is_binary(t) for t in table.schema.types):
+                raise UnicodeError("invalid UTF-8 beyond the sniffed sample")
+            # release Arrow buffers column by column as they are converted
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        except pa.ArrowInvalid as e:
+            logger.warning("pyarrow CSV parse failed with encoding=%s (%s); using pandas", enc, e)
+    src.seek(0)
+    return pd.read_csv(src, encoding=enc, usecols=usecols, low_memory=False)
+
+
+def _read_csv_to_df(src: BinaryIO, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a CSV (seekable binary stream) to DataFrame, optionally only `usecols`.
+    The encoding is sniffed once, so the file is parsed once; only text that
+    turns out not to be UTF-8 past the sample is re-read as latin-1 (which
+    decodes any byte). Other parse errors are raised straight away.
+    """
+    enc = _sniff_encoding(src)
+    try:
+        df = _parse_csv(src, enc, usecols)
+    except UnicodeError as e:
+        if enc == "latin-1":
+            raise ValueError(f"Could not read CSV with encoding={enc}: {e}")
+        logger.warning("CSV is not %s (%s); re-reading as latin-1", enc, e)
+        enc = "latin-1"
+        df = _parse_csv(src, enc, usecols)
+    except Exception as e:
+        raise ValueError(f"Could not read CSV with encoding={enc}: {e}")
+    logger.info("DataFrame (cols=%s) read with encoding=%s; shape=%s", usecols or "all", enc, df.shape)
+    return df
 
 
-def _read_dbf_bytes_to_df(raw: bytes) -> pd.DataFrame:
+def _read_dbf_to_df(src: BinaryIO) -> pd.DataFrame:
     """
-    Read DBF bytes into DataFrame using temporary file.
+    Read a DBF stream into DataFrame using temporary file.
     """
     tmp_file_path = None
     try:
         # Create a temporary file since simpledbf doesn't support BytesIO
         with tempfile.NamedTemporaryFile(delete=False, suffix='.dbf') as tmp_file:
-            tmp_file.write(raw)
+            src.seek(0)
+            shutil.copyfileobj(src, tmp_file)
             tmp_file.flush()
             tmp_file_path = tmp_file.name
         
@@ -119,80 +249,70 @@ def _read_dbf_bytes_to_df(raw: bytes) -> pd.DataFrame:
                 logger.warning("Failed to clean up temp file %s: %s", tmp_file_path, cleanup_error)
 
 
-def _read_dbf_columns_only(raw: bytes) -> List[str]:
+def _read_dbf_columns_only(src: BinaryIO) -> List[str]:
     """
-    Read column names from DBF bytes. 
-    Note: This still reads the full file due to simpledbf limitations.
-    For better performance, consider converting large .dbf files to .csv first.
+    Read column names from a DBF stream by parsing only the header
+    (32-byte file header + one 32-byte descriptor per field); records are
+    never touched, so this costs the same for any file size. Names are
+    decoded the same way simpledbf does.
     """
-    tmp_file_path = None
     try:
-        # Create a temporary file since simpledbf doesn't support BytesIO
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.dbf') as tmp_file:
-            tmp_file.write(raw)
-            tmp_file.flush()
-            tmp_file_path = tmp_file.name
-        
-        # Close the file handle before reading
-        # Read the DBF file to get column names
-        dbf = Dbf5(tmp_file_path)
-        df = dbf.to_dataframe()
-        cols = df.columns.tolist()
-        
+        head = src.read(32)
+        if len(head) < 32:
+            raise ValueError("truncated header")
+        _numrec, lenheader = struct.unpack("<xxxxLH22x", head)
+        numfields = (lenheader - 33) // 32
+        cols = []
+        for _ in range(numfields):
+            desc = src.read(32)
+            if len(desc) < 32:
+                raise ValueError("truncated field descriptor")
+            name, _typ, _size = struct.unpack("<11sc4xB15x", desc)
+            cols.append(name.strip(b"\x00").decode("utf-8"))
+        if src.read(1) != b"\r":
+            raise ValueError("missing header terminator")
         return cols
     except Exception as e:
         raise ValueError(f"Could not read DBF columns: {e}")
-    finally:
-        # Clean up the temporary file
-        if tmp_file_path and os.path.exists(tmp_file_path):
-            try:
-                # Wait a moment to ensure file handles are released
-                import time
-                time.sleep(0.1)
-                os.unlink(tmp_file_path)
-            except Exception as cleanup_error:
-                logger.warning("Failed to clean up temp file %s: %s", tmp_file_path, cleanup_error)
 
 
-def _pick_first_csv_from_zip(zf: zipfile.ZipFile) -> Tuple[str, bytes]:
+def _pick_zip_member(zf: zipfile.ZipFile, ext: str) -> zipfile.ZipInfo:
     """
-    Pick the first .csv file in a ZIP (prefer top-level CSVs), return (name, bytes).
+    Pick the first member ending in `ext` (prefer top-level files), without reading it.
     """
-    csv_infos = [info for info in zf.infolist() if info.filename.lower().endswith(".csv")]
-    if not csv_infos:
-        raise ValueError("No CSV file found in ZIP archive.")
+    infos = [info for info in zf.infolist() if info.filename.lower().endswith(ext)]
+    if not infos:
+        raise ValueError(f"No {ext[1:].upper()} file found in ZIP archive.")
 
-    # Prefer top-level CSVs (no folders in name), else just first
-    csv_infos.sort(key=lambda i: ("/" in i.filename or "\\" in i.filename, i.filename.lower()))
-    target = csv_infos[0]
-    with zf.open(target) as fh:
-        data = fh.read()
-    logger.info("Picked CSV from zip: %s (%d bytes)", target.filename, len(data))
-    return target.filename, data
+    # Prefer top-level files (no folders in name), else just first
+    infos.sort(key=lambda i: ("/" in i.filename or "\\" in i.filename, i.filename.lower()))
+    return infos[0]
 
 
-def _pick_first_dbf_from_zip(zf: zipfile.ZipFile) -> Tuple[str, bytes]:
+def _spool_zip_member(zf: zipfile.ZipFile, ext: str) -> Tuple[str, BinaryIO]:
     """
-    Pick the first .dbf file in a ZIP (prefer top-level DBFs), return (name, bytes).
+    Pick the first `ext` member in a ZIP (prefer top-level files) and stream it into
+    a spooled temp file (RAM up to SPOOL_MAX_BYTES, then disk); return (name, stream).
     """
-    dbf_infos = [info for info in zf.infolist() if info.filename.lower().endswith(".dbf")]
-    if not dbf_infos:
-        raise ValueError("No DBF file found in ZIP archive.")
-
-    # Prefer top-level DBFs (no folders in name), else just first
-    dbf_infos.sort(key=lambda i: ("/" in i.filename or "\\" in i.filename, i.filename.lower()))
-    target = dbf_infos[0]
+    target = _pick_zip_member(zf, ext)
+    _check_size(target.file_size, f"ZIP member {target.filename}")
+    tmp = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
     with zf.open(target) as fh:
-        data = fh.read()
-    logger.info("Picked DBF from zip: %s (%d bytes)", target.filename, len(data))
-    return target.filename, data
+        while chunk := fh.read(1 << 20):
+            # the central directory's size can lie, so also bound what is inflated,
+            # checking the running count before a chunk is written
+            _check_size(tmp.tell() + len(chunk), f"ZIP member {target.filename}")
+            tmp.write(chunk)
+    tmp.seek(0)
+    logger.info("Picked %s from zip: %s (%d bytes)", ext[1:].upper(), target.filename, target.file_size)
+    return target.filename, tmp
 
 
 def extract_columns(upload: UploadFile) -> List[str]:
     """
     Accepts .csv, .dbf directly or a .zip containing .csv/.dbf; returns header columns.
     For CSV: reads only the header row (≤64KB).
-    For DBF: reads the full file to get column names.
+    For DBF: reads only the field descriptors in the file header.
     """
     fname = upload.filename or ""
     logger.info("extract_columns: filename=%s", fname)
@@ -212,36 +332,31 @@ def extract_columns(upload: UploadFile) -> List[str]:
         return cols
 
     if lower.endswith(".dbf"):
-        # For DBF, read column names (note: this reads full file due to library limitations)
-        logger.info("extract_columns: Processing DBF file (this may take a moment for large files)")
         upload.file.seek(0)
-        raw = upload.file.read()
+        cols = _read_dbf_columns_only(upload.file)
         upload.file.seek(0)
-        logger.info("extract_columns: DBF file size: %d bytes", len(raw))
-        cols = _read_dbf_columns_only(raw)
         logger.info("extract_columns: DBF columns=%s", cols)
         return cols
 
-    # ZIP case - try CSV first, then DBF
-    upload.file.seek(0)
-    raw_zip = upload.file.read()
+    # ZIP case - try CSV first, then DBF (ZipFile reads the spooled upload in place)
     upload.file.seek(0)
     try:
-        with zipfile.ZipFile(io.BytesIO(raw_zip)) as zf:
+        with zipfile.ZipFile(upload.file) as zf:
             # Try CSV first
+            # Only the start of the member is inflated; the rest is never read
             try:
-                name, csv_bytes = _pick_first_csv_from_zip(zf)
-                cols = _read_header_from_bytes(csv_bytes[:65536])
-                logger.info("extract_columns: ZIP->CSV=%s; columns=%s", name, cols)
+                info = _pick_zip_member(zf, ".csv")
+                with zf.open(info) as fh:
+                    cols = _read_header_from_bytes(fh.read(65536))
+                logger.info("extract_columns: ZIP->CSV=%s; columns=%s", info.filename, cols)
                 return cols
             except ValueError as csv_err:
                 # No CSV found, try DBF
                 try:
-                    name, dbf_bytes = _pick_first_dbf_from_zip(zf)
-                    logger.info("extract_columns: Processing DBF from ZIP (this may take a moment for large files)")
-                    logger.info("extract_columns: ZIP->DBF=%s; size: %d bytes", name, len(dbf_bytes))
-                    cols = _read_dbf_columns_only(dbf_bytes)
-                    logger.info("extract_columns: ZIP->DBF=%s; columns=%s", name, cols)
+                    info = _pick_zip_member(zf, ".dbf")
+                    with zf.open(info) as fh:
+                        cols = _read_dbf_columns_only(fh)
+                    logger.info("extract_columns: ZIP->DBF=%s; columns=%s", info.filename, cols)
                     return cols
                 except ValueError as dbf_err:
                     raise ValueError(f"No CSV or DBF file found in ZIP archive. CSV error: {csv_err}, DBF error: {dbf_err}")
@@ -259,55 +374,36 @@ def dataframe_from_upload(upload: UploadFile) -> pd.DataFrame:
     fname = (upload.filename or "").lower()
     logger.info("dataframe_from_upload: filename=%s", upload.filename)
 
-    upload.file.seek(0)
-    raw = upload.file.read()
-    upload.file.seek(0)
+    # UploadFile.file is already a spooled temp file: parse it in place
+    src = _upload_stream(upload)
 
     if fname.endswith(".csv"):
-        return _read_csv_bytes_to_df(raw)
+        return _read_csv_to_df(src)
     
     if fname.endswith(".dbf"):
-        return _read_dbf_bytes_to_df(raw)
+        return _read_dbf_to_df(src)
 
     # ZIP case - try CSV first, then DBF
-    with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+    with zipfile.ZipFile(src) as zf:
         try:
-            _, csv_bytes = _pick_first_csv_from_zip(zf)
-            return _read_csv_bytes_to_df(csv_bytes)
+            _, member = _spool_zip_member(zf, ".csv")
+            with member:
+                return _read_csv_to_df(member)
         except ValueError:
             # No CSV found, try DBF
-            _, dbf_bytes = _pick_first_dbf_from_zip(zf)
-            return _read_dbf_bytes_to_df(dbf_bytes)
+            _, member = _spool_zip_member(zf, ".dbf")
+            with member:
+                return _read_dbf_to_df(member)
 
 
 # --- FAST column-only readers for plots ---
-def _read_csv_bytes_to_df_cols(raw: bytes, usecols: List[str]) -> pd.DataFrame:
-    candidates = []
-    candidates.append(_detect_encoding(raw[:4096]))
-    for c in ("utf-8-sig", "utf-8", "latin-1"):
-        if c not in candidates:
-            candidates.append(c)
-
-    last_err: Optional[Exception] = None
-    for enc in candidates:
-        try:
-            df = pd.read_csv(io.BytesIO(raw), encoding=enc, usecols=usecols, low_memory=False)
-            logger.info("DataFrame (cols=%s) read with encoding=%s; shape=%s", usecols, enc, df.shape)
-            return df
-        except Exception as e:
-            last_err = e
-            logger.warning("DataFrame (cols=%s) read failed with encoding=%s: %s", usecols, enc, e)
-
-    raise ValueError(f"Could not read CSV with candidate encodings; last error: {last_err}")
-
-
-def _read_dbf_bytes_to_df_cols(raw: bytes, usecols: List[str]) -> pd.DataFrame:
+def _read_dbf_to_df_cols(src: BinaryIO, usecols: List[str]) -> pd.DataFrame:
     """
-    Read DBF bytes into DataFrame with only specified columns.
+    Read a DBF stream into DataFrame with only specified columns.
     """
     try:
         # Read full DBF first, then select columns
-        df = _read_dbf_bytes_to_df(raw)
+        df = _read_dbf_to_df(src)
         # Check if all requested columns exist
         missing_cols = [col for col in usecols if col not in df.columns]
         if missing_cols:
@@ -321,25 +417,25 @@ def dataframe_from_upload_cols(upload: UploadFile, usecols: List[str]) -> pd.Dat
     fname = (upload.filename or "").lower()
     logger.info("dataframe_from_upload_cols: filename=%s usecols=%s", upload.filename, usecols)
 
-    upload.file.seek(0)
-    raw = upload.file.read()
-    upload.file.seek(0)
+    src = _upload_stream(upload)
 
     if fname.endswith(".csv"):
-        return _read_csv_bytes_to_df_cols(raw, usecols)
+        return _read_csv_to_df(src, usecols)
     
     if fname.endswith(".dbf"):
-        return _read_dbf_bytes_to_df_cols(raw, usecols)
+        return _read_dbf_to_df_cols(src, usecols)
 
     # ZIP case - try CSV first, then DBF
-    with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+    with zipfile.ZipFile(src) as zf:
         try:
-            _, csv_bytes = _pick_first_csv_from_zip(zf)
-            return _read_csv_bytes_to_df_cols(csv_bytes, usecols)
+            _, member = _spool_zip_member(zf, ".csv")
+            with member:
+                return _read_csv_to_df(member, usecols)
         except ValueError:
             # No CSV found, try DBF
-            _, dbf_bytes = _pick_first_dbf_from_zip(zf)
-            return _read_dbf_bytes_to_df_cols(dbf_bytes, usecols)
+            _, member = _spool_zip_member(zf, ".dbf")
+            with member:
+                return _read_dbf_to_df_cols(member, usecols)
 
 
 def make_run_token() -> str:
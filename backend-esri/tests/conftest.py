@@ -0,0 +1,39 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# tests import the app the way uvicorn does, as the top-level "app" package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import cache_service  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Fresh RAM tiers and a private disk tier per test."""
+    monkeypatch.setattr(cache_service, "CACHE_DIR", str(tmp_path / "grid-cache"))
+    monkeypatch.setattr(cache_service, "_STORE", cache_service._RamLRU(
+        cache_service.MAX_ENTRIES, cache_service.MAX_BYTES, cache_service._nbytes))
+    monkeypatch.setattr(cache_service, "_PARSED", cache_service._RamLRU(
+        cache_service.PARSED_MAX_ENTRIES, cache_service.PARSED_MAX_BYTES, cache_service._frame_nbytes))
+    return cache_service
+
+
+@pytest.fixture
+def sample_csvs(tmp_path):
+    """An Original and a DL assay table in projected metres over the same area."""
+    rng = np.random.default_rng(0)
+    paths = []
+    for name, n in (("original.csv", 600), ("dl.csv", 500)):
+        df = pd.DataFrame({
+            "EAST": rng.uniform(400_000, 410_000, n),
+            "NORTH": rng.uniform(6_500_000, 6_506_000, n),
+            "Te_ppm": rng.lognormal(0.0, 1.0, n),
+        })
+        path = tmp_path / name
+        df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
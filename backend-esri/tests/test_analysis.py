@@ -0,0 +1,82 @@
+import base64
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("httpx")  # fastapi's TestClient needs it; not an app dependency
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.routers.analysis import _grid_csv_chunks  # noqa: E402
+
+FORM = {
+    "original_easting": "EAST", "original_northing": "NORTH", "original_assay": "Te_ppm",
+    "dl_easting": "EAST", "dl_northing": "NORTH", "dl_assay": "Te_ppm",
+    "grid_size": "1000", "treat_as": "meters",
+}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:  # runs the lifespan, so the compute pool is up
+        yield c
+
+
+def _files(paths, keys):
+    return {k: (p.name, p.read_bytes(), "text/csv") for k, p in zip(keys, paths)}
+
+
+@pytest.mark.parametrize("method", ["mean", "median", "max"])
+def test_grid_csv_matches_comparison(client, sample_csvs, method):
+    form = {**FORM, "method": method}
+    r = client.post("/api/analysis/comparison", files=_files(sample_csvs, ("original", "dl")), data=form)
+    assert r.status_code == 200
+    grid = r.json()
+    nx, ny = grid["nx"], grid["ny"]
+
+    r = client.post("/api/analysis/export/grid-csv",
+                    files=_files(sample_csvs, ("original_file", "dl_file")), data=form)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    csv = pd.read_csv(io.StringIO(r.text))
+
+    assert list(csv.columns) == ["cell_id", "grid_ix", "grid_iy", "centroid_x", "centroid_y",
+                                 f"orig_{method}", f"dl_{method}", "delta"]
+    assert len(csv) == nx * ny
+    np.testing.assert_array_equal(csv["cell_id"], np.arange(nx * ny))
+    np.testing.assert_allclose(csv["centroid_x"], np.tile(grid["x"], ny))
+    np.testing.assert_allclose(csv["centroid_y"], np.repeat(grid["y"], nx))
+    # /comparison sends float32 grids; the CSV carries the float64 values
+    for col, field in ((f"orig_{method}", "orig_b64"), (f"dl_{method}", "dl_b64"), ("delta", "cmp_b64")):
+        wire = np.frombuffer(base64.b64decode(grid[field]), dtype="<f4")
+        np.testing.assert_allclose(csv[col].to_numpy(dtype=np.float32), wire, rtol=0, equal_nan=True)
+
+
+def test_grid_csv_blocks_join_to_one_table():
+    arr = np.arange(15, dtype=float).reshape(3, 5)
+    g = {"nx": 5, "ny": 3, "cell": 10.0, "xmin": 100.0, "ymin": 200.0,
+         "arr_orig": arr, "arr_dl": arr * 2, "arr_cmp": arr}
+    blocks = list(_grid_csv_chunks(g, "mean", chunk=4))
+    assert len(blocks) == 4
+    assert blocks[0].startswith("cell_id,") and not any(b.startswith("cell_id,") for b in blocks[1:])
+    assert "".join(blocks) == "".join(_grid_csv_chunks(g, "mean"))
+
+
+def test_grid_csv_rejects_unknown_column(client, sample_csvs):
+    form = {**FORM, "method": "mean", "original_assay": "NOPE"}
+    r = client.post("/api/analysis/export/grid-csv",
+                    files=_files(sample_csvs, ("original_file", "dl_file")), data=form)
+    assert r.status_code == 400
+
+
+def test_export_plots_accepts_null_flags(client, sample_csvs):
+    flags = {"originalHistogram": True, "qqPlot": None, "dlHeatmap": None}
+    r = client.post("/api/analysis/export/plots",
+                    files=_files(sample_csvs, ("original_file", "dl_file")),
+                    data={"original_assay": "Te_ppm", "dl_assay": "Te_ppm",
+                          "selected_plots": json.dumps(flags)})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/zip"
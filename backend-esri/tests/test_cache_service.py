@@ -0,0 +1,75 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def _entry(n):
+    return {"arr_orig": np.arange(n, dtype=float), "nx": n, "cell": 10.0}
+
+
+def test_ram_lru_tracks_bytes_and_evicts_oldest(isolated_cache):
+    lru = isolated_cache._RamLRU(max_entries=8, max_bytes=2000, sizeof=isolated_cache._nbytes)
+    for i in range(3):
+        lru.put(i, _entry(100))  # 800 bytes each
+    assert lru.get(0) is None and lru.get(1) is not None
+    assert lru._bytes == 1600
+    lru.put(1, _entry(10))  # replacing an entry subtracts the size it was stored with
+    assert lru._bytes == 880
+    assert sum(size for _, size, _ in lru._items.values()) == lru._bytes
+
+
+def test_ram_lru_expires_idle_entries(isolated_cache, monkeypatch):
+    lru = isolated_cache._RamLRU(8, 1 << 20, isolated_cache._nbytes)
+    now = time.monotonic()
+    lru.put("a", _entry(4))
+    monkeypatch.setattr(isolated_cache.time, "monotonic", lambda: now + isolated_cache.TTL_SECONDS + 1)
+    assert lru.get("a") is None
+    assert lru._bytes == 0
+
+
+def test_disk_tier_round_trip(isolated_cache):
+    isolated_cache.put_cached(("k", 1), _entry(5))
+    isolated_cache._STORE._items.clear()  # as another worker would see it
+
+    hit = isolated_cache.get_cached(("k", 1))
+    np.testing.assert_array_equal(hit["arr_orig"], np.arange(5.0))
+    assert hit["nx"] == 5 and hit["cell"] == 10.0
+    assert not hit["arr_orig"].flags.writeable
+    if hasattr(os, "getuid"):
+        assert os.stat(isolated_cache.CACHE_DIR).st_mode & 0o777 == 0o700
+
+
+def test_disk_entries_expire(isolated_cache):
+    isolated_cache.put_cached(("k", 2), _entry(5))
+    isolated_cache._STORE._items.clear()
+    path = isolated_cache._entry_dir(("k", 2))
+    old = time.time() - isolated_cache.TTL_SECONDS - 1
+    os.utime(path, (old, old))
+
+    assert isolated_cache.get_cached(("k", 2)) is None
+    assert not os.path.exists(path)
+
+
+def test_disk_entries_are_versioned(isolated_cache, monkeypatch):
+    isolated_cache.put_cached(("k", 3), _entry(5))
+    isolated_cache._STORE._items.clear()
+    monkeypatch.setattr(isolated_cache, "CACHE_VERSION", isolated_cache.CACHE_VERSION + 1)
+    assert isolated_cache.get_cached(("k", 3)) is None
+
+
+def test_own_open_cache_dir_is_made_private(isolated_cache):
+    if not hasattr(os, "getuid"):
+        return
+    os.makedirs(isolated_cache.CACHE_DIR)
+    os.chmod(isolated_cache.CACHE_DIR, 0o777)  # as created before the mode was set
+    assert isolated_cache._cache_dir_ok()
+    assert os.stat(isolated_cache.CACHE_DIR).st_mode & 0o777 == 0o700
+
+
+def test_parsed_frames_are_cached_by_key(isolated_cache):
+    df = pd.DataFrame({"Te_ppm": [1.0, 2.0]})
+    isolated_cache.put_parsed(("digest", ("Te_ppm",)), df)
+    assert isolated_cache.get_parsed(("digest", ("Te_ppm",))) is df
+    assert isolated_cache.get_parsed(("digest", ("other",))) is None
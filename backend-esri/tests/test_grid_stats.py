@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.comparisons import max_diff, mean_diff, median_diff
+
+NX, NY = 6, 4
+
+
+def _frame(seed, n=300):
+    rng = np.random.default_rng(seed)
+    v = rng.lognormal(0.0, 1.0, n)
+    v[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({"grid_ix": rng.integers(0, NX, n), "grid_iy": rng.integers(0, NY - 1, n), "Te_ppm": v})
+
+
+@pytest.mark.parametrize("fn, stat", [(mean_diff, "mean"), (median_diff, "median"), (max_diff, "max")])
+def test_stats_match_groupby(fn, stat):
+    dl, orig = _frame(1), _frame(2)
+    arr_orig, arr_dl, arr_cmp = fn(dl, orig, NX, NY)
+    for df, arr in ((orig, arr_orig), (dl, arr_dl)):
+        # reference: groupby over the samples, NaN where a cell has no values
+        ref = np.full((NY, NX), np.nan)
+        s = df.dropna().groupby(["grid_iy", "grid_ix"])["Te_ppm"].agg(stat)
+        ref[s.index.get_level_values(0), s.index.get_level_values(1)] = s.to_numpy()
+        np.testing.assert_allclose(arr, ref, rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(arr_cmp, arr_dl - arr_orig, rtol=1e-12, equal_nan=True)
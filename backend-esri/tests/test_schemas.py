@@ -0,0 +1,23 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models.schemas import LegendConfig, SelectedPlots
+
+
+def test_selected_plots_missing_and_null_flags_are_off():
+    flags = SelectedPlots.model_validate_json('{"qqPlot": null, "dlHeatmap": true}')
+    assert not flags.qqPlot and not flags.originalHistogram
+    assert flags.dlHeatmap is True
+
+
+def test_selected_plots_rejects_non_boolean_flag():
+    with pytest.raises(ValidationError):
+        SelectedPlots.model_validate_json('{"qqPlot": "sometimes"}')
+
+
+def test_legend_config_fills_defaults():
+    cfg = LegendConfig.model_validate_json('{"dl": {"min": 1, "max": 5, "auto": false}}').model_dump()
+    assert cfg["dl"] == {"min": 1.0, "max": 5.0, "auto": False}
+    assert cfg["original"] == cfg["comparison"] == {"min": None, "max": None, "auto": True}
+    # null auto stays falsy, as the untyped config was
+    assert not LegendConfig.model_validate_json('{"original": {"auto": null}}').original.auto
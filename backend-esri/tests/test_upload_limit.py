@@ -0,0 +1,71 @@
+import io
+import zipfile
+
+import pytest
+
+pytest.importorskip("httpx")  # fastapi's TestClient needs it; not an app dependency
+from fastapi import FastAPI, File, UploadFile  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.services import io_service  # noqa: E402
+from app.services.io_service import BodySizeLimit, UploadTooLarge  # noqa: E402
+
+CAP = 64 << 10
+
+
+@pytest.fixture
+def limited():
+    calls = []
+    app = FastAPI()
+    app.add_middleware(BodySizeLimit, max_bytes=CAP)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        calls.append(file.filename)
+        return {"size": len(await file.read())}
+
+    return TestClient(app), calls
+
+
+def _multipart(payload: bytes) -> tuple[bytes, str]:
+    boundary = "limit-test"
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.csv\"\r\n"
+            f"Content-Type: text/csv\r\n\r\n").encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def test_small_upload_passes(limited):
+    client, calls = limited
+    r = client.post("/upload", files={"file": ("a.csv", b"x" * 1000, "text/csv")})
+    assert r.status_code == 200 and r.json() == {"size": 1000}
+    assert calls == ["a.csv"]
+
+
+def test_declared_length_over_cap_is_refused_unread(limited):
+    client, calls = limited
+    r = client.post("/upload", files={"file": ("a.csv", b"x" * (2 * CAP), "text/csv")})
+    assert r.status_code == 413
+    assert calls == []
+
+
+def test_streamed_body_is_cut_off_at_the_cap(limited):
+    client, calls = limited
+    body, content_type = _multipart(b"x" * (4 * CAP))
+
+    def chunks():  # no Content-Length: the running count has to catch it
+        for i in range(0, len(body), 8 << 10):
+            yield body[i:i + (8 << 10)]
+
+    r = client.post("/upload", content=chunks(), headers={"content-type": content_type})
+    assert "content-length" not in r.request.headers
+    assert r.status_code == 413 and "limit" in r.json()["detail"]
+    assert calls == []
+
+
+def test_zip_member_is_bounded_while_inflating(monkeypatch):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("data.csv", b"0" * (3 << 20))
+    monkeypatch.setattr(io_service, "MAX_UPLOAD_BYTES", 2 << 20)
+    with zipfile.ZipFile(buf) as zf, pytest.raises(UploadTooLarge):
+        io_service._spool_zip_member(zf, ".csv")
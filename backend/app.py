@@ -1,7 +1,6 @@
 import os
 import time
 import sys
-import io
 from pathlib import Path
 import subprocess
 from flask import Flask, request, jsonify, Response
@@ -59,6 +58,8 @@ def _pick_two_inputs(candidates: list[Path]) -> tuple[Path, Path]:
     """Choose orig & dl files from a list (prefer names containing 'orig'/'dl')."""
     data = []
     seen_shp = set()
+    orig = dl = None
+    # single pass: filter data files and note the first 'orig'/'dl' name match
     for p in candidates:
         ext = p.suffix.lower()
         if ext in ALLOWED_DATA_EXTS:
@@ -68,17 +69,16 @@ def _pick_two_inputs(candidates: list[Path]) -> tuple[Path, Path]:
                     continue
                 seen_shp.add(p.stem)
             data.append(p)
+            name = p.name.lower()
+            if orig is None and "orig" in name:
+                orig = p
+            if dl is None and "dl" in name:
+                dl = p
 
-    def find_kw(kw):
-        for q in data:
-            if kw in q.name.lower():
-                return q
-        return None
-
-    orig = find_kw("orig")
-    dl   = find_kw("dl")
     if orig and dl:
         return orig, dl
+    if len(data) < 2:
+        raise ValueError("Need two data files (.parquet, .csv, .geojson, .json or .shp)")
     return data[0], data[1]
 
 @app.post("/run-comparison")
@@ -183,24 +183,28 @@ def export_comp_grid_csv():
 
     try:
         import geopandas as gpd
-    except ImportError:
-        return jsonify({"status": "error", "message": "Missing geopandas"}), 500
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError as e:
+        return jsonify({"status": "error", "message": f"Missing dependency: {e.name}"}), 500
 
     try:
         gdf = gpd.read_parquet(comp_path.as_posix())
         if "cell_id" not in gdf.columns:
             gdf = gdf.reset_index().rename(columns={"index": "cell_id"})
         centroids = gdf.geometry.centroid
-        out_df = gdf.drop(columns=["geometry"], errors="ignore").copy()
+        out_df = pd.DataFrame(gdf.drop(columns=["geometry"], errors="ignore"))
         out_df["centroid_x"] = centroids.x
         out_df["centroid_y"] = centroids.y
 
-        csv_buf = io.StringIO()
-        out_df.to_csv(csv_buf, index=False)
-        csv_buf.seek(0)
+        # pyarrow's multithreaded C++ writer straight to bytes; no text round-trip
+        buf = pa.BufferOutputStream()
+        pa_csv.write_csv(pa.Table.from_pandas(out_df, preserve_index=False), buf,
+                         pa_csv.WriteOptions(quoting_style="needed"))
         filename = f"comp_grid_{d.name}.csv"
         return Response(
-            csv_buf.getvalue(),
+            buf.getvalue().to_pybytes(),
             mimetype="text/csv",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
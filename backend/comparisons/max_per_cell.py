@@ -9,19 +9,29 @@ import numpy as np
 # Internal helper
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _cell_key(gdf, nx):
+    """Packed int64 cell key; reuse the Grid_ID that assign_grid_index stored at ingest."""
+    if 'Grid_ID' in gdf.columns:
+        return gdf['Grid_ID'].to_numpy(dtype=np.int64)
+    return gdf['grid_iy'].to_numpy(dtype=np.int64) * nx + gdf['grid_ix'].to_numpy(dtype=np.int64)
+
+
 def _fill_stat_array(gdf, nx, ny, stat_func):
     """Helper: compute grid-wise stats and return a filled 2D array."""
     arr = np.zeros((ny, nx), dtype=float)
     if len(gdf) > 0:
-        gid = gdf['grid_iy'].values * nx + gdf['grid_ix'].values
-        stat = (
-            gdf.assign(grid_id=gid)
-               .groupby('grid_id')['Te_ppm']
-               .agg(stat_func)
-        )
-        iy = (stat.index.values // nx).astype(int)
-        ix = (stat.index.values % nx).astype(int)
-        arr[iy, ix] = stat.values
+        # group Te_ppm straight on the packed int64 cell key; no copy of the frame
+        gid = _cell_key(gdf, nx)
+        if stat_func == "max":
+            # the key is already a dense cell code: reduce into arr by code and
+            # skip groupby's hashing (fmax skips NaN; all-NaN cells stay NaN)
+            flat = np.full(nx * ny, np.nan)
+            np.fmax.at(flat, gid, gdf['Te_ppm'].to_numpy(dtype=float))
+            flat[np.bincount(gid, minlength=nx * ny) == 0] = 0.0
+            return flat.reshape(ny, nx)
+        stat = gdf['Te_ppm'].groupby(gid, sort=False).agg(stat_func)
+        # the key is iy * nx + ix, i.e. the flat index into arr
+        arr.reshape(-1)[stat.index.to_numpy()] = stat.to_numpy()
     return arr
 
 
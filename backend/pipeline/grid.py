@@ -7,7 +7,7 @@ from dataclasses import dataclass
 import math
 import numpy as np
 import geopandas as gpd
-from shapely.geometry import box
+import shapely
 
 
 # Use an equal-area CRS for AU by default; change if your project needs others.
@@ -56,26 +56,19 @@ def make_grid_spec(orig: gpd.GeoDataFrame, dl: gpd.GeoDataFrame, cell_size_m: in
 
 
 def make_regular_grid(spec: GridSpec) -> gpd.GeoDataFrame:
-    """Build row-major grid polygons with ix, iy, Grid_ID."""
-    polys = []
-    ix_all = []
-    iy_all = []
-    for iy in range(spec.ny):
-        y0 = spec.miny + iy * spec.cell
-        y1 = y0 + spec.cell
-        for ix in range(spec.nx):
-            x0 = spec.minx + ix * spec.cell
-            x1 = x0 + spec.cell
-            polys.append(box(x0, y0, x1, y1))
-            ix_all.append(ix)
-            iy_all.append(iy)
+    """Build row-major grid polygons with ix, iy, Grid_ID (one vectorised shapely.box call)."""
+    grid_id = np.arange(spec.ny * spec.nx, dtype=np.int64)
+    iy_all, ix_all = np.divmod(grid_id, spec.nx)
+    x0 = spec.minx + ix_all * spec.cell
+    y0 = spec.miny + iy_all * spec.cell
+    polys = shapely.box(x0, y0, x0 + spec.cell, y0 + spec.cell)
 
     grid = gpd.GeoDataFrame(
         {"ix": ix_all, "iy": iy_all},
         geometry=polys,
         crs=spec.crs
     )
-    grid["Grid_ID"] = grid["iy"] * spec.nx + grid["ix"]
+    grid["Grid_ID"] = grid_id
     return grid
 
 
@@ -36,19 +36,20 @@ def _is_s3(path: str) -> bool:
 
 def _join_arrays_to_grid(grid: gpd.GeoDataFrame, arr_orig, arr_dl, arr_cmp, nx: int, ny: int) -> tuple[gpd.GeoDataFrame, gpd.GeoDataFrame, gpd.GeoDataFrame]:
     """
-    For each cell (iy, ix), set columns from the corresponding array index.
-    Assumes grid has columns 'ix' and 'iy'.
+    For each cell, set columns from the corresponding array value.
+    Grid_ID is the row-major key iy * nx + ix, so it indexes the flattened
+    arrays directly; the three outputs share the grid's key/geometry columns
+    instead of copying the whole grid.
     """
-    g = grid.copy()
-    g["orig_max"] = arr_orig[g["iy"], g["ix"]]
-    g["dl_max"]   = arr_dl[g["iy"], g["ix"]]
-    g["delta"]    = arr_cmp[g["iy"], g["ix"]]
+    gid = grid["Grid_ID"].to_numpy()
+    base = grid[["Grid_ID", "geometry"]]
 
-    orig_grid = g[["Grid_ID", "orig_max", "geometry"]].copy()
-    dl_grid   = g[["Grid_ID", "dl_max", "geometry"]].copy()
-    comp_grid = g[["Grid_ID", "delta", "geometry"]].copy()
-    return orig_grid, dl_grid, comp_grid
+    def _with(col, arr):
+        out = base.copy(deep=False)
+        out.insert(1, col, arr.reshape(-1)[gid])
+        return out
 
+    return _with("orig_max", arr_orig), _with("dl_max", arr_dl), _with("delta", arr_cmp)
 
 def main():
     parser = argparse.ArgumentParser(description="Run comparison pipeline.")
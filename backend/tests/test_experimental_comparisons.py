@@ -0,0 +1,108 @@
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# experimental/ is a folder of scripts, not a package: load the module by path
+_PATH = Path(__file__).resolve().parents[2] / "experimental" / "comparisons.py"
+_spec = importlib.util.spec_from_file_location("experimental_comparisons", _PATH)
+C = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(C)
+
+NX, NY = 7, 5
+
+
+def _frame(seed, n=400, nan_frac=0.1):
+    rng = np.random.default_rng(seed)
+    v = rng.lognormal(0.0, 1.0, n)
+    v[rng.random(n) < nan_frac] = np.nan
+    return pd.DataFrame({
+        "grid_ix": rng.integers(0, NX, n),
+        "grid_iy": rng.integers(0, NY - 1, n),  # top row left empty
+        "Te_ppm": v,
+    })
+
+
+def _groupby_stat(df, stat):
+    # reference: the original groupby version (empty cells 0, all-NaN cells NaN)
+    arr = np.zeros((NY, NX))
+    s = df.groupby(["grid_iy", "grid_ix"])["Te_ppm"].agg(stat)
+    arr[s.index.get_level_values(0), s.index.get_level_values(1)] = s.to_numpy()
+    return arr
+
+
+@pytest.mark.parametrize("stat", ["max", "mean", "median"])
+def test_stat_diff_matches_groupby(stat):
+    dl, orig = _frame(1), _frame(2)
+    orig.loc[(orig.grid_ix == 0) & (orig.grid_iy == 0), "Te_ppm"] = np.nan  # an all-NaN cell
+    arr_orig, arr_dl, arr_cmp = C.COMPARISON_METHODS[stat](dl, orig, NX, NY)
+    np.testing.assert_allclose(arr_orig, _groupby_stat(orig, stat), rtol=1e-12)
+    np.testing.assert_allclose(arr_dl, _groupby_stat(dl, stat), rtol=1e-12)
+    assert np.isnan(arr_orig[0, 0])
+    assert (arr_orig[NY - 1] == 0).all()
+
+
+def test_engine_and_soa_match_module_functions():
+    dl, orig = _frame(3), _frame(4)
+    by_engine = C.compare_all(dl, orig, NX, NY)
+    by_soa = C.compare_all(C.to_soa(dl, NX, NY), C.to_soa(orig, NX, NY), NX, NY)
+    for method, fn in C.COMPARISON_METHODS.items():
+        expected = fn(dl, orig, NX, NY)
+        for got in (by_engine[method], by_soa[method]):
+            for a, b in zip(got, expected):
+                np.testing.assert_allclose(a, b, rtol=1e-12, atol=0, equal_nan=True, err_msg=method)
+
+
+def test_soa_for_another_grid_is_rejected():
+    dl, orig = _frame(5), _frame(6)
+    with pytest.raises(ValueError):
+        C.ComparisonEngine(C.to_soa(dl, NX, NY + 1), orig, NX, NY)
+
+
+def test_exact_emd_matches_scipy():
+    stats = pytest.importorskip("scipy.stats")
+    dl, orig = _frame(7, nan_frac=0), _frame(8, nan_frac=0)
+    _, _, arr_cmp = C.emd_distance(dl, orig, NX, NY)
+    for (iy, ix), o in orig.groupby(["grid_iy", "grid_ix"])["Te_ppm"]:
+        d = dl.loc[(dl.grid_iy == iy) & (dl.grid_ix == ix), "Te_ppm"]
+        if len(d):
+            assert arr_cmp[iy, ix] == pytest.approx(stats.wasserstein_distance(o, d), rel=1e-9)
+
+
+@pytest.mark.parametrize("bins", [16, 256])
+def test_binned_emd_within_two_bin_widths(bins):
+    dl, orig = _frame(9, nan_frac=0), _frame(10, nan_frac=0)
+    _, _, exact = C.emd_distance(dl, orig, NX, NY)
+    _, _, binned = C.emd_distance(dl, orig, NX, NY, bins=bins)
+    # snapping each sample to its bin edge moves it at most one bin width on
+    # each side, so the binned distance is within two widths of the exact one
+    both = pd.concat([dl, orig])
+    g = both.groupby(["grid_iy", "grid_ix"])["Te_ppm"]
+    width = np.zeros((NY, NX))
+    w = (g.max() - g.min()) / bins
+    width[w.index.get_level_values(0), w.index.get_level_values(1)] = w.to_numpy()
+    assert (np.abs(binned - exact) <= 2 * width + 1e-12).all()
+
+
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+def test_histograms_skip_nonfinite_values_without_casting_them():
+    dl, orig = _frame(12), _frame(13)
+    dl.loc[dl.index[::17], "Te_ppm"] = np.inf
+    dl.loc[dl.index[::5], "Te_ppm"] *= 50  # above the Original cell maxima
+    orig.loc[orig.index[::19], "Te_ppm"] = -np.inf
+    _, _, chi2 = C.chi_squared_test(dl, orig, NX, NY)
+    _, _, emd = C.emd_distance(dl, orig, NX, NY, bins=32)
+    assert np.isfinite(chi2).all() and np.isfinite(emd).all()
+
+
+def test_cell_ids_follow_reassigned_columns():
+    df = _frame(11)
+    first = C._cell_ids(df, NX, NY)
+    assert C._cell_ids(df, NX, NY) is first
+    df["grid_ix"] = (df["grid_ix"] + 1) % NX
+    np.testing.assert_array_equal(C._cell_ids(df, NX, NY),
+                                  df["grid_iy"].to_numpy() * NX + df["grid_ix"].to_numpy())
+    C.clear_cell_id_cache()
+    assert C._cell_ids(df, NX, NY) is not first
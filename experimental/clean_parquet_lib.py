@@ -76,7 +76,7 @@ def read_attributes(
 
     if suf == ".csv":
         logging.info(f"Reading CSV: {p}")
-        return pd.read_csv(p)
+        return pd.read_csv(p, engine="pyarrow")
 
     if suf == ".parquet":
         logging.info(f"Reading Parquet: {p}")
@@ -105,6 +105,45 @@ export async function runPlotsData(
   return res.json();
 }
 
+// Overlay points arrive as base64 little-endian float32 (easting, northing)
+// pairs, offset from the grid origin to keep float32 precision.
+function decodePoints(b64: string | undefined, x0: number, y0: number): number[][] | undefined {
+  if (!b64) return undefined;
+  const bin = atob(b64);
+  const bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  const f = new Float32Array(bytes.buffer);
+  const pts: number[][] = new Array(f.length / 2);
+  for (let i = 0; i < pts.length; i++) pts[i] = [f[2 * i] + x0, f[2 * i + 1] + y0];
+  return pts;
+}
+
+// Grids arrive as base64 little-endian float32 (or float64, per the
+// response's grid_dtype), row-major (ny, nx); gaps (NaN) become null, as
+// they were in the JSON arrays.
+function decodeGrid(
+  b64: string | undefined,
+  nx: number,
+  ny: number,
+  dtype: string = "float32"
+): (number | null)[][] | undefined {
+  if (!b64) return undefined;
+  const bin = atob(b64);
+  const bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  const f = dtype === "float64" ? new Float64Array(bytes.buffer) : new Float32Array(bytes.buffer);
+  const rows: (number | null)[][] = new Array(ny);
+  for (let r = 0; r < ny; r++) {
+    const row: (number | null)[] = new Array(nx);
+    for (let c = 0; c < nx; c++) {
+      const v = f[r * nx + c];
+      row[c] = Number.isFinite(v) ? v : null;
+    }
+    rows[r] = row;
+  }
+  return rows;
+}
+
 export async function runComparison(
   originalFile: File,
   dlFile: File,
@@ -142,7 +181,17 @@ export async function runComparison(
     const err = await res.json().catch(() => ({}));
     throw new Error(err?.detail ?? `Comparison failed (${res.status})`);
   }
-  return res.json();
+  const data = await res.json();
+  for (const k of ["orig", "dl", "cmp"]) {
+    data[k] = decodeGrid(data[`${k}_b64`], data.nx, data.ny, data.grid_dtype);
+    delete data[`${k}_b64`];
+  }
+  delete data.grid_dtype;
+  data.original_points = decodePoints(data.original_points_b64, data.xmin, data.ymin);
+  data.dl_points = decodePoints(data.dl_points_b64, data.xmin, data.ymin);
+  delete data.original_points_b64;
+  delete data.dl_points_b64;
+  return data;
 }
 
 export async function exportPlots(